@@ -14,14 +14,52 @@ Total cost: $0.00 - No credit card required!
 """
 
 import streamlit as st
-from groq import Groq
+from groq import Groq, RateLimitError
 from sentence_transformers import SentenceTransformer
-from langchain.document_loaders import PyPDFLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-import faiss
 import numpy as np
 import tempfile
+import hashlib
+import json
+import multiprocessing
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from pdf_pages import extract_pages, page_count
+from vector_index import build_index, choose_index_type, normalize, supports_remove
+
+# Chunking and embedding settings; they are part of the document fingerprint,
+# so changing any of them re-embeds documents instead of reusing stale vectors
+# (the FAISS index type is set via INDEX_TYPE, see vector_index.py)
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+# PDF pipeline: text extraction processes, pages per extraction task, and
+# chunks per embedding_model.encode() call (embedding starts as soon as the
+# first batch of chunks is ready, while later pages are still extracting)
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", min(4, os.cpu_count() or 1)))
+PAGES_PER_TASK = 8
+EMBED_BATCH_SIZE = 64
+
+# Where chunk embeddings are saved between runs (one folder per document)
+VECTOR_STORE_DIR = os.getenv("VECTOR_STORE_DIR", ".vector_store")
+
+# Documents whose embeddings are also kept in memory, least recently used
+# dropped first (they are still on disk, so a miss only costs a reload)
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", 16))
+
+# Groq rate limits: retries after a 429, the first backoff (doubled on each
+# retry, unless Groq sends retry-after), and the longest wait worth making
+# the user sit through instead of showing the error
+GROQ_MAX_RETRIES = 3
+GROQ_BACKOFF_SECS = 1.0
+GROQ_MAX_BACKOFF_SECS = 20.0
 
 # =============================================================================
 # GROQ API INTEGRATION WITH CONVERSATION MEMORY
@@ -37,27 +75,52 @@ def initialize_groq(api_key):
     Returns:
         Groq: Initialized Groq client object
     """
-    return Groq(api_key=api_key)
+    # Rate-limit retries are done by create_chat_completion, not the SDK
+    return Groq(api_key=api_key, max_retries=0)
 
-def get_groq_response_with_memory(client, context, question, conversation_history, model_name="llama-3.1-8b-instant"):
+def create_chat_completion(client, **kwargs):
     """
-    Get response from Groq API using RAG pattern with conversation memory
+    Call client.chat.completions.create, backing off when rate limited
     
-    This function:
-    1. Uses system prompts for better conversation awareness
-    2. Includes previous Q&A pairs as context
-    3. Handles references like "that", "it", "the topic we discussed"
-    4. Maintains document grounding while being conversational
+    On a 429 it waits for Groq's retry-after (or an exponential backoff
+    if there is none) and tries again, up to GROQ_MAX_RETRIES times. A
+    wait longer than GROQ_MAX_BACKOFF_SECS (e.g. the daily limit) is not
+    worth it, so the RateLimitError is raised straight away.
     
     Args:
         client (Groq): Initialized Groq client
+        **kwargs: Arguments for client.chat.completions.create
+        
+    Returns:
+        The completion, or the chunk stream if stream=True
+    """
+    for attempt in range(GROQ_MAX_RETRIES + 1):
+        try:
+            return client.chat.completions.create(**kwargs)
+        except RateLimitError as e:
+            retry_after = e.response.headers.get("retry-after")
+            delay = float(retry_after) if retry_after else GROQ_BACKOFF_SECS * 2 ** attempt
+            if attempt == GROQ_MAX_RETRIES or delay > GROQ_MAX_BACKOFF_SECS:
+                raise
+            time.sleep(delay)
+
+def build_messages(context, question, conversation_history):
+    """
+    Build the chat messages for a RAG question with conversation memory
+    
+    The messages:
+    1. Use a system prompt for better conversation awareness
+    2. Include previous Q&A pairs as context
+    3. Let the model resolve references like "that", "it", "the topic we discussed"
+    4. Keep the answer grounded in the document chunks
+    
+    Args:
         context (str): Relevant document chunks as context
         question (str): Current user question
         conversation_history (list): Previous Q&A pairs
-        model_name (str): Groq model to use
         
     Returns:
-        str: Generated answer with conversation awareness
+        list: Messages for client.chat.completions.create
     """
     
     # Build conversation messages for better context management
@@ -88,10 +151,31 @@ You maintain context across the conversation while staying grounded in the docum
 Current Question: {question}"""
     
     messages.append({"role": "user", "content": current_message})
+    return messages
+
+def get_groq_response_with_memory(client, context, question, conversation_history, model_name="llama-3.1-8b-instant"):
+    """
+    Get response from Groq API using RAG pattern with conversation memory
+    
+    Waits for the whole answer; see stream_groq_response_with_memory for
+    the streaming version the UI uses.
+    
+    Args:
+        client (Groq): Initialized Groq client
+        context (str): Relevant document chunks as context
+        question (str): Current user question
+        conversation_history (list): Previous Q&A pairs
+        model_name (str): Groq model to use
+        
+    Returns:
+        str: Generated answer with conversation awareness
+    """
+    messages = build_messages(context, question, conversation_history)
     
     try:
         # Make API call to Groq with conversation context
-        response = client.chat.completions.create(
+        response = create_chat_completion(
+            client,
             messages=messages,
             model=model_name,  # Using Llama 3.1 8B for speed and quality
             temperature=0.1,   # Low temperature for factual, consistent answers
@@ -102,6 +186,71 @@ Current Question: {question}"""
         # Return user-friendly error message
         return f"Error getting response: {str(e)}"
 
+def stream_groq_response_with_memory(client, context, question, conversation_history,
+                                     model_name="llama-3.1-8b-instant", stats=None):
+    """
+    Stream a response from Groq API, yielding text as it is generated
+    
+    Same request as get_groq_response_with_memory, but with stream=True so
+    the UI can show the answer while Groq is still writing it. Errors are
+    raised rather than returned as text, so a failed answer never ends up
+    in the conversation history.
+    
+    Args:
+        client (Groq): Initialized Groq client
+        context (str): Relevant document chunks as context
+        question (str): Current user question
+        conversation_history (list): Previous Q&A pairs
+        model_name (str): Groq model to use
+        stats (dict): Optional dict filled in once the stream ends with
+            ttft_secs (time to first token), total_secs, tokens and tokens_per_sec
+        
+    Yields:
+        str: Pieces of the answer, in order
+    """
+    messages = build_messages(context, question, conversation_history)
+    
+    start = time.perf_counter()
+    first_token_at = None
+    tokens = 0
+    usage = None
+    
+    stream = create_chat_completion(
+        client,
+        messages=messages,
+        model=model_name,
+        temperature=0.1,
+        max_tokens=1000,
+        stream=True
+    )
+    for chunk in stream:
+        # Groq reports exact token usage on the last chunk
+        x_groq = getattr(chunk, "x_groq", None)
+        if x_groq is not None and getattr(x_groq, "usage", None) is not None:
+            usage = x_groq.usage
+        
+        if not chunk.choices:
+            continue
+        text = chunk.choices[0].delta.content
+        if text:
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            tokens += 1  # Each streamed delta is about one token
+            yield text
+    
+    if stats is not None:
+        end = time.perf_counter()
+        if usage is not None:
+            tokens = usage.completion_tokens
+        ttft = (first_token_at or end) - start
+        generation_secs = end - (first_token_at or end)
+        stats.update(
+            ttft_secs=ttft,
+            total_secs=end - start,
+            tokens=tokens,
+            tokens_per_sec=tokens / generation_secs if generation_secs > 0 else 0.0
+        )
+
 # =============================================================================
 # LOCAL EMBEDDING MODEL
 # =============================================================================
@@ -119,7 +268,7 @@ def load_embedding_model():
     """
     # all-MiniLM-L6-v2 is a good balance of speed, size, and quality
     # It supports 100+ languages and creates 384-dimensional embeddings
-    return SentenceTransformer('all-MiniLM-L6-v2')
+    return SentenceTransformer(EMBEDDING_MODEL_NAME)
 
 # =============================================================================
 # LOCAL VECTOR STORE CLASS
@@ -130,47 +279,183 @@ class LocalVectorStore:
     A local vector store using FAISS for similarity search
     
     This class:
-    1. Stores document chunks and their embeddings
-    2. Creates a FAISS index for fast similarity search
-    3. Provides methods to add documents and search for similar content
+    1. Stores document chunks and their embeddings, for any number of documents
+    2. Creates a FAISS index for fast similarity search (type chosen by
+       corpus size unless INDEX_TYPE forces one, see vector_index.py)
+    3. Provides methods to add and remove documents and search for similar content
+    
+    Every chunk gets a stable integer id that the FAISS index returns from
+    searches, so documents can be added and removed without renumbering
+    (and re-indexing) the chunks of the other documents.
+    
+    The index itself is not saved: its ids and contents depend on which
+    documents this session uploaded, so each session builds its own from
+    the saved embeddings (see get_document_embeddings).
     """
     
-    def __init__(self, embedding_model):
+    def __init__(self, embedding_model, capacity=1024):
         """
         Initialize the vector store
         
         Args:
             embedding_model: SentenceTransformer model for creating embeddings
+            capacity (int): Embedding rows to preallocate (grows by doubling)
         """
         self.embedding_model = embedding_model
-        self.chunks = []           # Store original text chunks
-        self.embeddings = None     # Store embedding vectors
+        self.chunks = {}           # Chunk id -> original text chunk
+        self.documents = {}        # Document id -> ids of its chunks
         self.index = None          # FAISS search index
+        self.index_type = None     # Which kind of FAISS index was built
+        
+        # Embeddings live in a preallocated buffer; only the first _size rows
+        # are used, and _ids[row] is the chunk id of each row
+        self._capacity = capacity
+        self._vectors = None
+        self._ids = np.empty(capacity, dtype='int64')
+        self._size = 0
+        self._next_id = 0
+        self._requested_type = None  # Index type chosen for the corpus size at the last build
+        self._built_size = 0         # Vectors in the corpus at the last build
+    
+    @property
+    def embeddings(self):
+        """Embedding vectors of all chunks, one row per chunk (a view, not a copy)"""
+        if self._vectors is None:
+            return None
+        return self._vectors[:self._size]
     
-    def add_documents(self, documents):
+    def add_documents(self, documents, doc_id=None):
         """
         Add documents to the vector store and create embeddings
         
         This method:
         1. Extracts text content from document objects
         2. Creates embeddings for each chunk using the local model
-        3. Builds a FAISS index for fast similarity search
+        3. Adds them to the FAISS index for fast similarity search
         
         Args:
             documents (list): List of LangChain document objects
+            doc_id (str): Identifies these documents for remove_document()
+            
+        Returns:
+            list: Ids of the added chunks
         """
         # Extract text content from LangChain document objects
-        self.chunks = [doc.page_content for doc in documents]
+        texts = [doc.page_content for doc in documents]
+        return self.add_texts(texts, doc_id=doc_id)
+    
+    def add_texts(self, texts, embeddings=None, doc_id=None):
+        """
+        Add text chunks, embedding them unless embeddings are passed in
+        
+        A doc_id that is already in the store is not added twice.
+        
+        Args:
+            texts (list): Text chunks
+            embeddings (np.ndarray): Optional normalized embeddings, one row per chunk
+            doc_id (str): Identifies these chunks for remove_document()
+            
+        Returns:
+            list: Ids of the added chunks
+        """
+        if doc_id is None:
+            doc_id = f"doc-{self._next_id}"
+        if doc_id in self.documents:
+            return self.documents[doc_id]
+        if not texts:
+            return []
+        
+        if embeddings is None:
+            # Create embeddings locally (no API calls!)
+            # Normalized so inner product equals cosine similarity
+            embeddings = normalize(self.embedding_model.encode(texts))
+        
+        ids = np.arange(self._next_id, self._next_id + len(texts), dtype='int64')
+        self._next_id += len(texts)
+        
+        self._reserve(len(texts), embeddings.shape[1])
+        self._vectors[self._size:self._size + len(texts)] = embeddings
+        self._ids[self._size:self._size + len(texts)] = ids
+        self._size += len(texts)
+        
+        self.chunks.update(zip(ids.tolist(), texts))
+        self.documents[doc_id] = ids.tolist()
+        
+        # Add just the new vectors, unless the corpus grew enough to need a new index
+        if self._needs_rebuild():
+            self._rebuild_index()
+        else:
+            self.index.add_with_ids(embeddings, ids)
+        return self.documents[doc_id]
+    
+    def remove_document(self, doc_id):
+        """
+        Remove a document's chunks from the store and the index
         
-        # Create embeddings locally (no API calls!)
-        embeddings = self.embedding_model.encode(self.chunks)
-        self.embeddings = np.array(embeddings).astype('float32')
+        Args:
+            doc_id (str): Id the document was added with
+        """
+        ids = self.documents.pop(doc_id, None)
+        if not ids:
+            return
+        for chunk_id in ids:
+            del self.chunks[chunk_id]
         
-        # Create FAISS index for fast similarity search
-        # IndexFlatL2 uses L2 (Euclidean) distance for similarity
-        dimension = self.embeddings.shape[1]  # 384 for all-MiniLM-L6-v2
-        self.index = faiss.IndexFlatL2(dimension)
-        self.index.add(self.embeddings)
+        # Compact the embedding buffer over the removed rows
+        keep = ~np.isin(self._ids[:self._size], ids)
+        remaining = int(keep.sum())
+        self._vectors[:remaining] = self._vectors[:self._size][keep]
+        self._ids[:remaining] = self._ids[:self._size][keep]
+        self._size = remaining
+        
+        if self._size == 0:
+            self.index = self.index_type = None
+        elif supports_remove(self.index) and not self._needs_rebuild():
+            self.index.remove_ids(np.array(ids, dtype='int64'))
+        else:
+            self._rebuild_index()
+    
+    def _reserve(self, count, dimension):
+        """Make room for count more embeddings, doubling the buffer when full"""
+        if self._vectors is None:
+            self._capacity = max(self._capacity, count)
+            self._vectors = np.empty((self._capacity, dimension), dtype='float32')
+            self._ids = np.empty(self._capacity, dtype='int64')
+            return
+        needed = self._size + count
+        if needed <= self._capacity:
+            return
+        while self._capacity < needed:
+            self._capacity *= 2
+        vectors = np.empty((self._capacity, dimension), dtype='float32')
+        vectors[:self._size] = self._vectors[:self._size]
+        ids = np.empty(self._capacity, dtype='int64')
+        ids[:self._size] = self._ids[:self._size]
+        self._vectors, self._ids = vectors, ids
+    
+    def _needs_rebuild(self):
+        """
+        Whether the index should be rebuilt from the stored embeddings
+        
+        True when there is none yet, when the corpus size now calls for a
+        different index type, or when the corpus has grown 4x since an IVF
+        index was trained (its clusters no longer fit the data) or since
+        build_index() fell back to a simpler type for lack of vectors.
+        """
+        if self.index is None:
+            return True
+        if choose_index_type(self._size) != self._requested_type:
+            return True
+        undertrained = self.index_type.startswith("ivf") or self.index_type != self._requested_type
+        return undertrained and self._size > 4 * self._built_size
+    
+    def _rebuild_index(self):
+        """Build a fresh index over every stored embedding, keeping chunk ids"""
+        self._requested_type = choose_index_type(self._size)
+        self._built_size = self._size
+        self.index, self.index_type = build_index(
+            self.embeddings, self._requested_type, ids=self._ids[:self._size]
+        )
     
     def similarity_search(self, query, k=4):
         """
@@ -187,17 +472,16 @@ class LocalVectorStore:
             return []
         
         # Create embedding for the query
-        query_embedding = self.embedding_model.encode([query])
-        query_embedding = np.array(query_embedding).astype('float32')
+        query_embedding = normalize(self.embedding_model.encode([query]))
         
         # Search for similar chunks
-        distances, indices = self.index.search(query_embedding, k)
+        distances, ids = self.index.search(query_embedding, k)
         
         # Return the actual text chunks
         results = []
-        for i in indices[0]:
-            if i < len(self.chunks):
-                results.append(self.chunks[i])
+        for chunk_id in ids[0]:
+            if chunk_id in self.chunks:  # FAISS pads with -1 when k > number of chunks
+                results.append(self.chunks[chunk_id])
         
         return results
 
@@ -205,47 +489,348 @@ class LocalVectorStore:
 # DOCUMENT PROCESSING
 # =============================================================================
 
-@st.cache_data
-def load_and_split_pdf(uploaded_file):
+@st.cache_resource
+def get_pdf_pool():
+    """
+    Process pool for page-parallel PDF text extraction
+    
+    Created once per server process and shared by every session. Workers
+    are spawned rather than forked: forking a process that already loaded
+    torch can deadlock, and spawned workers only import pdf_pages.py.
+    
+    Returns:
+        ProcessPoolExecutor: The shared worker pool
+    """
+    return ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+def iter_pdf_pages(path):
+    """
+    Yield batches of extracted pages as soon as each one is ready
+    
+    Page ranges of PAGES_PER_TASK are extracted in parallel by the worker
+    pool and yielded in completion order, not page order. Short PDFs are
+    extracted inline, where starting a pool task would cost more than it saves.
+    
+    Args:
+        path (str): Path to the PDF file
+        
+    Yields:
+        tuple: (list of (page number, text) pairs, total page count)
+    """
+    total_pages = page_count(path)
+    if total_pages <= PAGES_PER_TASK:
+        yield extract_pages(path, 0, total_pages), total_pages
+        return
+    
+    pool = get_pdf_pool()
+    futures = [
+        pool.submit(extract_pages, path, start, min(start + PAGES_PER_TASK, total_pages))
+        for start in range(0, total_pages, PAGES_PER_TASK)
+    ]
+    for future in as_completed(futures):
+        yield future.result(), total_pages
+
+def load_split_and_embed_pdf(uploaded_file, embedding_model, progress=None):
     """
-    Load PDF file and split it into chunks for processing
+    Load PDF file, split it into chunks and embed them, as a pipeline
     
     This function:
     1. Saves the uploaded file temporarily
-    2. Uses LangChain to extract text from PDF
-    3. Splits text into manageable chunks with overlap
-    4. Cleans up temporary files
-    
-    Uses Streamlit's cache_data decorator to avoid reprocessing the same file
+    2. Extracts the text of its pages in parallel (see iter_pdf_pages)
+    3. Splits each batch of pages into chunks as soon as it arrives
+    4. Embeds the chunks EMBED_BATCH_SIZE at a time while later pages are
+       still being extracted, instead of waiting for the whole PDF
+    5. Cleans up temporary files
     
     Args:
         uploaded_file: Streamlit uploaded file object
+        embedding_model: Loaded sentence transformer model
+        progress (callable): Optional progress(pages_done, total_pages, chunks_embedded)
         
     Returns:
-        list: List of text chunks as LangChain document objects
+        tuple: (text chunks in page order, normalized embeddings, one row per chunk)
     """
     # Save uploaded file to temporary location
     with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
         tmp_file.write(uploaded_file.getvalue())
         tmp_path = tmp_file.name
     
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,        # Each chunk ~1000 characters
+        chunk_overlap=CHUNK_OVERLAP,  # 200 character overlap to preserve context
+        separators=["\n\n", "\n", " ", ""]  # Split on paragraphs, then lines, then words
+    )
+    
+    keys, texts, batches = [], [], []  # (page, position) of each chunk, its text, embedded batches
+    embedded = 0
+    
+    def embed_pending():
+        nonlocal embedded
+        batches.append(normalize(embedding_model.encode(texts[embedded:])))
+        embedded = len(texts)
+    
     try:
-        # Load PDF using LangChain's PyPDFLoader
-        loader = PyPDFLoader(tmp_path)
-        documents = loader.load()
-        
-        # Split documents into chunks
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,    # Each chunk ~1000 characters
-            chunk_overlap=200,  # 200 character overlap to preserve context
-            separators=["\n\n", "\n", " ", ""]  # Split on paragraphs, then lines, then words
-        )
-        chunks = text_splitter.split_documents(documents)
+        pages_done = 0
+        for pages, total_pages in iter_pdf_pages(tmp_path):
+            # Split pages into chunks (pages never share a chunk, as before with PyPDFLoader)
+            for page_no, page_text in pages:
+                for position, chunk in enumerate(text_splitter.split_text(page_text)):
+                    keys.append((page_no, position))
+                    texts.append(chunk)
+            
+            # Embed full batches now; the rest waits for more pages
+            if len(texts) - embedded >= EMBED_BATCH_SIZE:
+                embed_pending()
+            
+            pages_done += len(pages)
+            if progress:
+                progress(pages_done, total_pages, embedded)
         
-        return chunks
+        if len(texts) > embedded:
+            embed_pending()
+            if progress:
+                progress(pages_done, total_pages, embedded)
     finally:
         # Clean up temporary file
         os.unlink(tmp_path)
+    
+    if not texts:
+        return [], None
+    
+    # Batches arrived in completion order; put chunks back in page order
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    embeddings = np.concatenate(batches)[order]
+    return [texts[i] for i in order], embeddings
+
+# =============================================================================
+# SAVED DOCUMENT EMBEDDINGS
+# =============================================================================
+
+def document_fingerprint(file_bytes):
+    """
+    Content hash that identifies a document's saved embeddings
+    
+    The same PDF gives the same fingerprint whatever its file name, and
+    the embedding model and chunk settings are mixed in, so embeddings are
+    only reused if they were made exactly the way we would make them now.
+    
+    Args:
+        file_bytes (bytes): Raw content of the uploaded file
+        
+    Returns:
+        str: Hex SHA-256 fingerprint
+    """
+    hasher = hashlib.sha256()
+    hasher.update(f"{EMBEDDING_MODEL_NAME}:{CHUNK_SIZE}:{CHUNK_OVERLAP}:normalized:".encode())
+    hasher.update(file_bytes)
+    return hasher.hexdigest()
+
+def upload_fingerprint(uploaded_file):
+    """
+    document_fingerprint() of an uploaded file, hashed once per upload
+    
+    Every question reruns the script with the same uploaded files, so the
+    fingerprint is kept in session_state under the upload's file_id
+    instead of hashing the whole PDF again on each rerun.
+    
+    Args:
+        uploaded_file: Streamlit uploaded file object
+        
+    Returns:
+        str: Hex SHA-256 fingerprint
+    """
+    fingerprints = st.session_state.setdefault('upload_fingerprints', {})
+    if uploaded_file.file_id not in fingerprints:
+        fingerprints[uploaded_file.file_id] = document_fingerprint(uploaded_file.getvalue())
+    return fingerprints[uploaded_file.file_id]
+
+def save_document_embeddings(path, texts, embeddings):
+    """
+    Save a document's chunks and their embeddings to a folder
+    
+    The chunks go to a JSON file and the vectors to a NumPy file. Both are
+    written to temporary names and then renamed, so a crash mid-save never
+    leaves half-written files that later runs would load.
+    
+    Args:
+        path (str): Folder to save into (created if missing)
+        texts (list): Text chunks
+        embeddings (np.ndarray): Normalized embeddings, one row per chunk
+    """
+    os.makedirs(path, exist_ok=True)
+    chunks_path = os.path.join(path, "chunks.json")
+    embeddings_path = os.path.join(path, "embeddings.npy")
+    
+    with open(chunks_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(texts, f)
+    os.replace(chunks_path + ".tmp", chunks_path)
+    
+    # The embeddings are written last: their presence marks a complete save
+    with open(embeddings_path + ".tmp", "wb") as f:
+        np.save(f, embeddings)
+    os.replace(embeddings_path + ".tmp", embeddings_path)
+
+def load_document_embeddings(path):
+    """
+    Load chunks and embeddings saved with save_document_embeddings()
+    
+    Args:
+        path (str): Folder they were saved to
+        
+    Returns:
+        tuple or None: (texts, embeddings), or None if nothing complete is saved there
+    """
+    chunks_path = os.path.join(path, "chunks.json")
+    embeddings_path = os.path.join(path, "embeddings.npy")
+    if not (os.path.exists(chunks_path) and os.path.exists(embeddings_path)):
+        return None
+    
+    with open(chunks_path, encoding="utf-8") as f:
+        texts = json.load(f)
+    return texts, np.load(embeddings_path)
+
+class EmbeddingCache:
+    """
+    Least-recently-used cache of document embeddings, keyed by fingerprint
+    
+    Holds at most max_size documents; the lock makes it safe to share
+    between the sessions Streamlit runs in separate threads.
+    """
+    
+    def __init__(self, max_size=EMBEDDING_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def get(self, fingerprint):
+        """Return the cached (texts, embeddings, loaded_from_disk), or None"""
+        with self.lock:
+            if fingerprint not in self.entries:
+                return None
+            self.entries.move_to_end(fingerprint)
+            return self.entries[fingerprint]
+    
+    def put(self, fingerprint, result):
+        """Cache a result, dropping the least recently used ones over max_size"""
+        with self.lock:
+            self.entries[fingerprint] = result
+            self.entries.move_to_end(fingerprint)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+@st.cache_resource
+def get_embedding_cache():
+    """
+    In-memory cache of computed document embeddings, keyed by fingerprint
+    
+    An EmbeddingCache behind cache_resource rather than caching
+    get_document_embeddings() itself: that function updates a progress bar
+    created outside it, which Streamlit cannot replay from its cache.
+    
+    Returns:
+        EmbeddingCache: Shared by all sessions, bounded by EMBEDDING_CACHE_SIZE
+    """
+    return EmbeddingCache()
+
+def get_document_embeddings(fingerprint, uploaded_file, embedding_model, progress=None):
+    """
+    Return a document's chunks and embeddings, computing them only once
+    
+    Lookup order:
+    1. The in-memory cache - shared by every rerun and every session
+       of this server process, keyed by the fingerprint and holding the
+       EMBEDDING_CACHE_SIZE most recently used documents
+    2. The saved files in VECTOR_STORE_DIR/<fingerprint> - survive restarts
+    3. Compute them: extract, split and embed the PDF, then save to disk
+    
+    Args:
+        fingerprint (str): document_fingerprint() of the uploaded file
+        uploaded_file: Streamlit uploaded file object
+        embedding_model: Loaded sentence transformer model
+        progress (callable): Optional progress callback, see load_split_and_embed_pdf
+        
+    Returns:
+        tuple: (texts, embeddings or None if the PDF has no text, bool loaded_from_disk)
+    """
+    cache = get_embedding_cache()
+    cached = cache.get(fingerprint)
+    if cached is not None:
+        return cached
+    
+    path = os.path.join(VECTOR_STORE_DIR, fingerprint)
+    saved = load_document_embeddings(path)
+    if saved is not None:
+        result = saved[0], saved[1], True
+    else:
+        texts, embeddings = load_split_and_embed_pdf(uploaded_file, embedding_model, progress)
+        if embeddings is not None:
+            save_document_embeddings(path, texts, embeddings)
+        result = texts, embeddings, False
+    
+    cache.put(fingerprint, result)
+    return result
+
+def sync_vector_store(vector_store, uploaded_files, embedding_model, progress=None):
+    """
+    Make the vector store hold exactly the uploaded documents
+    
+    Documents that were removed from the uploader are dropped from the
+    index; new ones are added using their cached or saved embeddings.
+    Documents already in the store are left alone, so every rerun (each
+    question reruns this script) does no indexing work at all.
+    
+    Args:
+        vector_store (LocalVectorStore): This session's store
+        uploaded_files (list): Streamlit uploaded file objects
+        embedding_model: Loaded sentence transformer model
+        progress (callable): Optional progress(file_name, pages_done, total_pages, chunks_embedded)
+        
+    Returns:
+        dict: File name -> status ("indexed", "loaded from disk", "already indexed",
+            "no text" or "failed: <error>" - one broken PDF does not stop the others)
+    """
+    # The same PDF uploaded twice is indexed once
+    uploads = {}
+    for uploaded_file in uploaded_files:
+        uploads.setdefault(upload_fingerprint(uploaded_file), uploaded_file)
+    
+    # Forget the fingerprints of files no longer in the uploader
+    file_ids = {uploaded_file.file_id for uploaded_file in uploaded_files}
+    fingerprints = st.session_state.get('upload_fingerprints', {})
+    for file_id in list(fingerprints):
+        if file_id not in file_ids:
+            del fingerprints[file_id]
+    
+    for doc_id in list(vector_store.documents):
+        if doc_id not in uploads:
+            vector_store.remove_document(doc_id)
+    
+    statuses = {}
+    for fingerprint, uploaded_file in uploads.items():
+        if fingerprint in vector_store.documents:
+            statuses[uploaded_file.name] = "already indexed"
+            continue
+        file_progress = partial(progress, uploaded_file.name) if progress else None
+        try:
+            texts, embeddings, from_disk = get_document_embeddings(
+                fingerprint, uploaded_file, embedding_model, file_progress
+            )
+        except Exception as e:
+            # e.g. an encrypted or corrupt PDF
+            if isinstance(e, BrokenProcessPool):
+                get_pdf_pool.clear()  # A worker died; the next rerun starts a fresh pool
+            statuses[uploaded_file.name] = f"failed: {e}"
+            continue
+        if embeddings is None:
+            statuses[uploaded_file.name] = "no text"
+            continue
+        vector_store.add_texts(texts, embeddings, doc_id=fingerprint)
+        statuses[uploaded_file.name] = "loaded from disk" if from_disk else "indexed"
+    return statuses
 
 # =============================================================================
 # CONVERSATION MANAGEMENT
@@ -270,46 +855,63 @@ def manage_conversation_context(conversation_history, max_exchanges=10):
 # MAIN PROCESSING PIPELINE
 # =============================================================================
 
-def process_document(uploaded_file, groq_client, embedding_model):
+def process_documents(uploaded_files, groq_client, embedding_model):
     """
     Main document processing pipeline with conversation memory
     
     This function orchestrates the entire RAG pipeline:
-    1. Loads and splits the PDF
-    2. Creates embeddings and vector store
+    1. Loads and splits each PDF (skipped when its embeddings are already saved)
+    2. Adds new documents to this session's vector store and drops removed ones
+       (each document is indexed once, see sync_vector_store)
     3. Sets up the conversational Q&A interface
     4. Handles user questions with conversation context
     
     Args:
-        uploaded_file: Streamlit uploaded file object
+        uploaded_files (list): Streamlit uploaded file objects
         groq_client: Initialized Groq API client
         embedding_model: Loaded sentence transformer model
     """
-    st.write("📄 Processing your document...")
+    st.write(f"📄 Processing {len(uploaded_files)} document(s)...")
     
-    # Step 1: Load and split PDF
-    with st.spinner("📖 Reading PDF..."):
-        chunks = load_and_split_pdf(uploaded_file)
+    # Steps 1-2: Load, split and embed new PDFs - or reuse their saved embeddings.
+    # Every question reruns this script, so this must not redo the work each time.
+    if 'vector_store' not in st.session_state:
+        st.session_state.vector_store = LocalVectorStore(embedding_model)
+    vector_store = st.session_state.vector_store
+    progress_bar = None
     
-    if not chunks:
-        st.error("❌ Could not extract text from PDF")
-        return
+    def show_progress(name, pages_done, total_pages, chunks_embedded):
+        nonlocal progress_bar
+        text = f"📖 {name}: read {pages_done}/{total_pages} pages, embedded {chunks_embedded} chunks (running locally)..."
+        if progress_bar is None:
+            progress_bar = st.progress(0.0, text=text)
+        progress_bar.progress(pages_done / total_pages if total_pages else 1.0, text=text)
+    
+    statuses = sync_vector_store(vector_store, uploaded_files, embedding_model, show_progress)
+    if progress_bar is not None:
+        progress_bar.empty()
     
-    st.success(f"✅ Document loaded! Found {len(chunks)} chunks")
+    for name, status in statuses.items():
+        if status == "no text":
+            st.error(f"❌ Could not extract text from {name}")
+        elif status.startswith("failed"):
+            st.error(f"❌ Could not process {name} ({status})")
+        elif status != "already indexed":
+            st.caption(f"📎 {name}: {status}")
     
-    # Step 2: Create vector store with embeddings
-    with st.spinner("🧮 Creating embeddings (running locally)..."):
-        vector_store = LocalVectorStore(embedding_model)
-        vector_store.add_documents(chunks)
+    if vector_store.index is None:
+        return
     
-    st.success("✅ Document ready for questions!")
+    st.success(
+        f"✅ {len(vector_store.documents)} document(s) ready for questions! "
+        f"{len(vector_store.chunks)} chunks, {vector_store.index_type} index"
+    )
     
     # Step 3: Initialize conversation history if not exists
     if 'conversation_history' not in st.session_state:
         st.session_state.conversation_history = []
     
     # Step 4: Store everything in session state for persistence
-    st.session_state.vector_store = vector_store
     st.session_state.groq_client = groq_client
     st.session_state.ready = True
 
@@ -339,6 +941,7 @@ def process_document(uploaded_file, groq_client, embedding_model):
         if st.session_state.conversation_history:
             if st.button("🗑️ Clear Conversation History"):
                 st.session_state.conversation_history = []
+                st.session_state.answer_stats = []
                 st.success("Conversation history cleared!")
                 st.rerun()
         
@@ -353,7 +956,7 @@ def process_document(uploaded_file, groq_client, embedding_model):
         # Process question when user enters one
         if question:
             try:
-                with st.spinner("🤔 Thinking... (using conversation context + Groq's lightning-fast API)"):
+                with st.spinner("🔍 Finding relevant chunks..."):
                     # Step 5a: Find relevant chunks using similarity search
                     relevant_chunks = st.session_state.vector_store.similarity_search(question, k=4)
                     
@@ -369,25 +972,44 @@ def process_document(uploaded_file, groq_client, embedding_model):
                         st.session_state.conversation_history, 
                         max_exchanges=10
                     )
-                    
-                    # Step 5d: Get response with conversation memory
-                    answer = get_groq_response_with_memory(
-                        st.session_state.groq_client, 
-                        context, 
-                        question, 
-                        conversation_history,
-                        st.session_state.get('selected_model', 'llama-3.1-8b-instant')
-                    )
-                    
-                    # Step 5e: Store this Q&A in conversation history
-                    st.session_state.conversation_history.append((question, answer))
                 
-                # Step 5f: Display results
+                # Step 5d: Stream the response with conversation memory,
+                # rendering it as the tokens arrive
                 st.write("**🎯 Answer:**")
-                st.write(answer)
+                answer_placeholder = st.empty()
+                answer = ""
+                stats = {}
+                for text in stream_groq_response_with_memory(
+                    st.session_state.groq_client, 
+                    context, 
+                    question, 
+                    conversation_history,
+                    st.session_state.get('selected_model', 'llama-3.1-8b-instant'),
+                    stats=stats
+                ):
+                    answer += text
+                    answer_placeholder.markdown(answer + "▌")
+                answer_placeholder.markdown(answer)
+                
+                # An empty answer is not worth remembering: it would only
+                # teach the model to answer the next question the same way
+                if not answer.strip():
+                    answer_placeholder.empty()
+                    st.warning("🤷 The model returned an empty answer. Please try asking again.")
+                    return
+                
+                # Step 5e: Store this Q&A in conversation history, now that
+                # the stream completed (a failed stream raises before this)
+                st.session_state.conversation_history.append((question, answer))
+                st.session_state.setdefault('answer_stats', []).append(stats)
                 
-                # Show performance info
+                # Step 5f: Show performance info
                 st.success("⚡ Powered by Groq's blazing-fast inference + conversation memory!")
+                st.caption(
+                    f"⏱️ First token in {stats['ttft_secs']:.2f}s · "
+                    f"{stats['tokens']} tokens at {stats['tokens_per_sec']:.0f} tokens/sec · "
+                    f"{stats['total_secs']:.2f}s total"
+                )
                 
                 # Show conversation history
                 if len(st.session_state.conversation_history) > 1:
@@ -409,8 +1031,8 @@ def process_document(uploaded_file, groq_client, embedding_model):
                 
             except Exception as e:
                 # Handle different types of errors gracefully
-                if "rate limit" in str(e).lower():
-                    st.error("🕐 Rate limit reached. Please wait a moment and try again.")
+                if isinstance(e, RateLimitError):
+                    st.error("🕐 Rate limit reached, even after retrying. Please wait a minute and try again.")
                     st.info("💡 Free tier limits are generous but not unlimited!")
                 elif "context_length" in str(e).lower():
                     st.error("📏 Conversation too long. Clearing older messages...")
@@ -500,22 +1122,23 @@ def main():
     st.session_state.max_history = max_history
     
     # File upload widget
-    uploaded_file = st.file_uploader(
-        "Choose a PDF file", 
+    uploaded_files = st.file_uploader(
+        "Choose PDF files", 
         type="pdf",
-        help="Upload any PDF document to start asking questions about it"
+        accept_multiple_files=True,
+        help="Upload one or more PDF documents to start asking questions about them"
     )
     
-    # Process uploaded file
-    if uploaded_file is not None:
-        process_document(uploaded_file, groq_client, embedding_model)
+    # Process uploaded files
+    if uploaded_files:
+        process_documents(uploaded_files, groq_client, embedding_model)
     else:
         # Show instructions when no file is uploaded
         st.markdown("""
         ### 🚀 Getting Started
         1. **Get your free Groq API key** at https://console.groq.com
         2. **Enter your API key** in the sidebar
-        3. **Upload a PDF document** using the file uploader above
+        3. **Upload one or more PDF documents** using the file uploader above
         4. **Start asking questions** - the AI remembers your conversation!
         
         ### 💡 Example Questions to Try
@@ -0,0 +1,114 @@
+# =============================================================================
+# FAISS INDEX BENCHMARK
+# Recall@k vs query latency for each index type on synthetic corpora
+# =============================================================================
+"""
+Compare the index types in vector_index.py without downloading a model or
+uploading a PDF. Each corpus is a mixture of Gaussian clusters on the unit
+sphere (real sentence embeddings are clustered by topic, so uniform random
+vectors would make every approximate index look worse than it is).
+
+Recall@k is the share of the exact top-k (from a flat index) that each index
+returns; latency is measured one query at a time, the way the app searches.
+
+Usage:
+    python benchmark_index.py
+    python benchmark_index.py --sizes 1000 20000 200000 --k 4 --queries 200
+
+Build times for HNSW and IVF-PQ grow quickly; the largest default corpus
+takes a minute or two on a laptop CPU.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from vector_index import INDEX_TYPES, build_index, choose_index_type, normalize
+
+DIMENSION = 384  # Same as all-MiniLM-L6-v2
+
+
+def synthetic_corpus(num_vectors, num_queries, dimension=DIMENSION, seed=0):
+    """
+    Generate clustered, normalized corpus and query vectors
+
+    Args:
+        num_vectors (int): Corpus size
+        num_queries (int): Number of queries, drawn from the same clusters
+        dimension (int): Embedding size
+        seed (int): Random seed, for repeatable runs
+
+    Returns:
+        tuple: (corpus, queries) as normalized float32 arrays
+    """
+    rng = np.random.default_rng(seed)
+    num_clusters = max(1, num_vectors // 100)
+    centers = rng.standard_normal((num_clusters, dimension))
+
+    def sample(count):
+        labels = rng.integers(num_clusters, size=count)
+        return normalize(centers[labels] + 1.5 * rng.standard_normal((count, dimension)))
+
+    return sample(num_vectors), sample(num_queries)
+
+
+def recall_at_k(found, expected):
+    """
+    Average share of the expected neighbours that were found
+
+    Args:
+        found (np.ndarray): (q, k) ids returned by the index under test
+        expected (np.ndarray): (q, k) ids returned by exact search
+
+    Returns:
+        float: Recall between 0 and 1
+    """
+    hits = sum(len(set(f) & set(e)) for f, e in zip(found, expected))
+    return hits / expected.size
+
+
+def benchmark(index, queries, k):
+    """
+    Search one query at a time and time it
+
+    Returns:
+        tuple: (ids as a (q, k) array, mean latency in milliseconds)
+    """
+    ids = []
+    start = time.perf_counter()
+    for query in queries:
+        _, found = index.search(query[None, :], k)
+        ids.append(found[0])
+    elapsed = time.perf_counter() - start
+    return np.array(ids), 1000 * elapsed / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000],
+                        help="Corpus sizes to test")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per corpus")
+    parser.add_argument("--k", type=int, default=4, help="Neighbours per query (the app uses 4)")
+    args = parser.parse_args()
+
+    print(f"{'vectors':>9} {'requested':>10} {'built':>9} {'build s':>8} {'ms/query':>9} {'recall@' + str(args.k):>9}")
+    for size in args.sizes:
+        corpus, queries = synthetic_corpus(size, args.queries)
+        exact, _ = build_index(corpus, "flat")
+        _, expected = exact.search(queries, args.k)
+
+        for index_type in INDEX_TYPES:
+            start = time.perf_counter()
+            index, built = build_index(corpus, index_type)
+            build_secs = time.perf_counter() - start
+
+            found, latency_ms = benchmark(index, queries, args.k)
+            recall = recall_at_k(found, expected)
+            print(f"{size:>9} {index_type:>10} {built:>9} {build_secs:>8.2f} {latency_ms:>9.3f} {recall:>9.3f}")
+
+        print(f"{'':>9} auto picks {choose_index_type(size, 'auto')}")
+
+
+if __name__ == "__main__":
+    main()
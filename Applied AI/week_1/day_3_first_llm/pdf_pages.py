@@ -0,0 +1,45 @@
+# =============================================================================
+# PDF PAGE EXTRACTION
+# Text extraction for a range of pages, run in worker processes by app.py
+# =============================================================================
+"""
+pypdf's text extraction is pure Python, so threads would take turns on the
+GIL; app.py runs extract_pages() in a process pool instead, one page range
+per task. This lives in its own small module so worker processes only need
+to import pypdf, not Streamlit, torch and the rest of app.py.
+"""
+
+from pypdf import PdfReader
+
+
+def page_count(path):
+    """
+    Number of pages in a PDF
+
+    Args:
+        path (str): Path to the PDF file
+
+    Returns:
+        int: Page count
+    """
+    return len(PdfReader(path).pages)
+
+
+def extract_pages(path, start, stop):
+    """
+    Extract the text of pages [start, stop)
+
+    Each call opens its own reader: PdfReader objects cannot be shared
+    between processes, and parsing the cross-reference table is cheap next
+    to extracting the text of a batch of pages.
+
+    Args:
+        path (str): Path to the PDF file
+        start (int): First page number (0-based)
+        stop (int): Page number to stop before
+
+    Returns:
+        list: (page number, text) pairs, in page order
+    """
+    reader = PdfReader(path)
+    return [(page_no, reader.pages[page_no].extract_text() or "") for page_no in range(start, stop)]
@@ -0,0 +1,202 @@
+# =============================================================================
+# FAISS INDEX FACTORY
+# Pick and build the right nearest-neighbour index for the corpus size
+# =============================================================================
+"""
+FAISS index types used by the Q&A app (and benchmarked by benchmark_index.py):
+
+- flat:     exact search, compares the query with every chunk
+- ivf_flat: clusters the vectors and only searches the nearest clusters
+- ivf_pq:   IVF plus product quantization - compressed vectors, least memory
+- hnsw:     graph-based search, very fast and accurate, but more memory
+
+All of them use inner product on L2-normalized vectors, which is the cosine
+similarity MiniLM embeddings are trained for. When built with ids, searches
+return those ids instead of row positions (IVF indexes store ids natively,
+the others are wrapped in an IndexIDMap).
+"""
+
+import math
+import os
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+# "auto" picks by corpus size, or force one of INDEX_TYPES
+INDEX_TYPE = os.getenv("INDEX_TYPE", "auto")
+
+# Auto selection: exact search is already sub-millisecond for a few thousand
+# chunks; HNSW keeps recall high for mid-sized corpora but its build time and
+# graph memory grow with size, so very large ones get IVF-Flat. IVF-PQ is
+# never picked automatically: it saves the most memory but loses noticeable
+# recall at k=4 (run benchmark_index.py), so it has to be asked for
+FLAT_MAX_VECTORS = 10_000
+HNSW_MAX_VECTORS = 200_000
+
+# IVF settings: clusters searched per query, and training points per cluster
+# that FAISS needs for k-means to be meaningful
+IVF_NPROBE = 16
+IVF_MIN_POINTS_PER_LIST = 39
+
+# PQ settings: 8-bit codes, one sub-quantizer per 8 dimensions (must divide d)
+PQ_BITS = 8
+PQ_DIMS_PER_SUBQUANTIZER = 8
+
+# HNSW settings: graph degree, build-time and search-time beam widths
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 80
+HNSW_EF_SEARCH = 64
+
+
+def normalize(vectors):
+    """
+    Return float32 copies of vectors scaled to unit length
+
+    Args:
+        vectors (array-like): (n, d) embeddings
+
+    Returns:
+        np.ndarray: Normalized float32 array
+    """
+    vectors = np.array(vectors, dtype='float32')
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def choose_index_type(num_vectors, requested=None):
+    """
+    Resolve the index type to build for a corpus
+
+    Args:
+        num_vectors (int): Number of vectors to index
+        requested (str): One of INDEX_TYPES or "auto" (defaults to INDEX_TYPE)
+
+    Returns:
+        str: One of INDEX_TYPES
+    """
+    requested = requested or INDEX_TYPE
+    if requested == "auto":
+        if num_vectors <= FLAT_MAX_VECTORS:
+            return "flat"
+        if num_vectors <= HNSW_MAX_VECTORS:
+            return "hnsw"
+        return "ivf_flat"
+    if requested not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {requested!r}, expected 'auto' or one of {INDEX_TYPES}")
+    return requested
+
+
+def _ivf_lists(num_vectors):
+    """Number of IVF clusters: ~4*sqrt(n), capped so each has enough training points"""
+    nlist = int(4 * math.sqrt(num_vectors))
+    return max(1, min(nlist, num_vectors // IVF_MIN_POINTS_PER_LIST))
+
+
+def build_index(embeddings, index_type=None, ids=None):
+    """
+    Build and fill a FAISS index for normalized embeddings
+
+    IVF indexes are trained on the embeddings themselves. Corpora too small
+    to train one step down: IVF-PQ to IVF-Flat (too few points for the PQ
+    codebooks), IVF-Flat to an exact flat index (too few for clustering),
+    which is the fastest option at that size anyway.
+
+    Args:
+        embeddings (np.ndarray): (n, d) float32, already normalized
+        index_type (str): One of INDEX_TYPES or "auto" (defaults to INDEX_TYPE)
+        ids (np.ndarray): Optional int64 id per vector, returned by searches
+
+    Returns:
+        tuple: (faiss.Index, str index type actually built)
+    """
+    num_vectors, dimension = embeddings.shape
+    index_type = choose_index_type(num_vectors, index_type)
+    metric = faiss.METRIC_INNER_PRODUCT
+
+    if index_type == "ivf_pq":
+        nlist = _ivf_lists(num_vectors)
+        m = dimension // PQ_DIMS_PER_SUBQUANTIZER
+        if num_vectors < IVF_MIN_POINTS_PER_LIST * 2 ** PQ_BITS or dimension % PQ_DIMS_PER_SUBQUANTIZER:
+            index_type = "ivf_flat"  # Not enough points to train the PQ codebooks
+        else:
+            quantizer = faiss.IndexFlatIP(dimension)
+            index = faiss.IndexIVFPQ(quantizer, dimension, nlist, m, PQ_BITS, metric)
+            index.train(embeddings)
+
+    if index_type == "ivf_flat":
+        nlist = _ivf_lists(num_vectors)
+        if nlist < 2:
+            index_type = "flat"  # Not enough points for more than one cluster
+        else:
+            quantizer = faiss.IndexFlatIP(dimension)
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist, metric)
+            index.train(embeddings)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, HNSW_M, metric)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+
+    if index_type == "flat":
+        index = faiss.IndexFlatIP(dimension)
+
+    if ids is None:
+        index.add(embeddings)
+    else:
+        if not isinstance(index, faiss.IndexIVF):
+            index = faiss.IndexIDMap(index)
+        index.add_with_ids(embeddings, np.asarray(ids, dtype='int64'))
+    configure_search(index)
+    return index, index_type
+
+
+def _unwrap(index):
+    """The index inside an IndexIDMap, or the index itself"""
+    if isinstance(index, faiss.IndexIDMap):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def supports_remove(index):
+    """
+    Whether remove_ids() works on an index built by build_index()
+
+    HNSW graphs cannot drop nodes, so those indexes are rebuilt instead.
+    """
+    return index_type_of(index) != "hnsw"
+
+
+def index_type_of(index):
+    """
+    Name the type of an index built by build_index(), e.g. after loading it
+
+    Args:
+        index (faiss.Index): Index to inspect
+
+    Returns:
+        str: One of INDEX_TYPES
+    """
+    index = _unwrap(index)
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf_flat"
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    return "flat"
+
+
+def configure_search(index, nprobe=IVF_NPROBE, ef_search=HNSW_EF_SEARCH):
+    """
+    Apply search-time settings; call again after faiss.read_index()
+
+    Args:
+        index (faiss.Index): Index built by build_index()
+        nprobe (int): IVF clusters to visit per query
+        ef_search (int): HNSW beam width per query
+    """
+    index = _unwrap(index)
+    if isinstance(index, faiss.IndexIVF):
+        index.nprobe = min(nprobe, index.nlist)
+    elif isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = ef_search
@@ -3,22 +3,31 @@
 Demo FastAPI app for teaching:
  - Pydantic validation for request/response schemas
  - Dependency Injection (DI) for managing ML model instances
+ - Micro-batching: concurrent /predict calls share one vectorized NumPy prediction
  - Simple API key authentication for endpoint security
- - Caching using fastapi-cache2 (InMemory for development, Redis example commented)
+ - Caching using fastapi-cache2 backends shared by all workers (SQLite locally, Redis in production)
  - Clear, inline comments to explain each code block
 """
 
 import os
+import json
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from typing import List, Optional, Tuple
+import numpy as np
 from fastapi import FastAPI, Depends, HTTPException, status
 from pydantic import BaseModel
 from fastapi.security import APIKeyHeader
 
 # fastapi-cache2 imports (ensure fastapi-cache2 is installed)
-from fastapi_cache import FastAPICache, cache
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends import Backend
 from fastapi_cache.backends.inmemory import InMemoryBackend
-# If you plan to use Redis in production, uncomment these:
-# from aioredis import from_url
-# from fastapi_cache.backends.redis import RedisBackend
+# Redis (CACHE_BACKEND=redis) and fake Redis (CACHE_BACKEND=fakeredis) are imported on demand,
+# see build_cache_backend(): pip install "fastapi-cache2[redis]" fakeredis
 
 # Create the FastAPI application instance
 app = FastAPI(title="AI Inference Microservice Demo")
@@ -62,56 +71,383 @@ class MLModel:
     def __init__(self):
         # In real usage, load your model once here.
         # Example: self.model = joblib.load("model.joblib")
+        self.weights = np.array([0.6, 0.4])
         print("INFO: MLModel instance created (demo).")
 
     def predict(self, data: InputData) -> Prediction:
         """Perform a simple weighted-sum prediction (replace with real model inference)."""
-        value = data.feature1 * 0.6 + data.feature2 * 0.4
-        return Prediction(result=value)
+        return self.predict_batch([data])[0]
+
+    def predict_batch(self, items: List[InputData]) -> List[Prediction]:
+        """
+        Predict many inputs with one matrix-vector product instead of a Python loop.
+        Real models (sklearn, torch, onnx) are likewise far cheaper per row when given a batch.
+        """
+        features = np.array([[item.feature1, item.feature2] for item in items], dtype=np.float64)
+        values = features @ self.weights
+        return [Prediction(result=float(value)) for value in values]
+
+# Singleton: the model is loaded once per worker process, not once per request
+MODEL = MLModel()
 
 def get_model():
     """
-    Dependency function that returns an MLModel instance.
-    For a singleton pattern, create MODEL = MLModel() at module level and return it here.
+    Dependency function that returns the shared MLModel instance.
     """
-    return MLModel()
+    return MODEL
 
 # --------------------------------------------------------------------
-# 4. Cache initialization using fastapi-cache2
+# 4. Micro-batching
+# --------------------------------------------------------------------
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "64"))          # flush a batch at this many items...
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "5"))   # ...or this long after its first item
+PREDICT_BATCH_MAX_ITEMS = int(os.getenv("PREDICT_BATCH_MAX_ITEMS", "1000"))  # cap for /predict/batch
+
+class MicroBatcher:
+    """
+    Collects concurrent single predictions and runs them as one vectorized model call.
+    Each /predict call puts its input on a queue and awaits a future. A background task takes up to
+    BATCH_MAX_SIZE queued inputs, waiting at most BATCH_MAX_WAIT_MS for more after the first. It then
+    predicts them together and resolves every future. While the model runs, new requests keep
+    queueing, so the busier the service the bigger (and cheaper per request) each batch becomes.
+    """
+    def __init__(self, model: MLModel, max_batch_size: int = BATCH_MAX_SIZE, max_wait_ms: float = BATCH_MAX_WAIT_MS):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = None
+        self.worker = None
+
+    def start(self):
+        """Create the queue and the batching task; must run inside the server's event loop."""
+        self.queue = asyncio.Queue()
+        self.worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.worker:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, data: InputData) -> Prediction:
+        """Queue one input and wait for its prediction from the next batch."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((data, future))
+        return await future
+
+    async def _collect(self) -> list:
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # take whatever is already queued without waiting, then wait out the rest of the window
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            # skip callers that already went away (client disconnect cancels their future)
+            batch = [(data, future) for data, future in batch if not future.done()]
+            if not batch:
+                continue
+            try:
+                # off the event loop, so a heavy model never stalls request handling
+                predictions = await asyncio.to_thread(self.model.predict_batch, [data for data, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), prediction in zip(batch, predictions):
+                if not future.done():
+                    future.set_result(prediction)
+
+BATCHER = MicroBatcher(MODEL)
+
+def get_batcher():
+    """Dependency function that returns the shared MicroBatcher."""
+    return BATCHER
+
 # --------------------------------------------------------------------
+# 5. Shared cache (fastapi-cache2 backends)
+# --------------------------------------------------------------------
+# uvicorn --workers N runs N processes. An InMemoryBackend gives each one its own cold cache, so the
+# backend must live outside the process: SQLite on one box, Redis across boxes.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite")            # sqlite | redis | fakeredis | memory
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH", "/tmp/ai-inference-cache.sqlite3")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+CACHE_EXPIRE_SECONDS = int(os.getenv("CACHE_EXPIRE_SECONDS", "30"))
+CACHE_LOCK_TTL_MS = int(os.getenv("CACHE_LOCK_TTL_MS", "2000"))  # how long other workers wait on one computation
+MODEL_VERSION = os.getenv("MODEL_VERSION", "demo-v1")            # part of every key: a new model never serves stale results
+
+class SQLiteBackend(Backend):
+    """
+    fastapi-cache2 backend on a SQLite file, shared by every worker process on the machine.
+    WAL mode lets readers and a writer work at the same time. The blocking sqlite3 calls run in a
+    thread so the event loop keeps serving requests. Every prune_every-th write also deletes expired
+    rows, so the file stays bounded by the entries written within one expiry window.
+    """
+    def __init__(self, path: str, prune_every: int = 100):
+        self.prune_every = prune_every
+        self.writes = 0
+        self.connection = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, expires_at REAL)"
+            )
+
+    def _execute(self, sql: str, params: tuple = ()):
+        with self.lock:
+            return self.connection.execute(sql, params).fetchall()
+
+    def _delete(self, sql: str, params: tuple) -> int:
+        with self.lock:
+            return self.connection.execute(sql, params).rowcount
+
+    def _get_with_ttl(self, key: str):
+        rows = self._execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,))
+        if not rows:
+            return 0, None
+        value, expires_at = rows[0]
+        if expires_at is None:
+            return -1, value
+        ttl = expires_at - time.time()
+        return (int(ttl), value) if ttl > 0 else (0, None)
+
+    def _add(self, key: str, value: bytes, expire: float) -> bool:
+        # BEGIN IMMEDIATE takes the write lock, so exactly one process wins the insert
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                self.connection.execute("DELETE FROM cache WHERE key = ? AND expires_at <= ?", (key, time.time()))
+                added = self.connection.execute(
+                    "INSERT OR IGNORE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, value, time.time() + expire)
+                ).rowcount == 1
+                self.connection.execute("COMMIT")
+                return added
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+
+    async def get_with_ttl(self, key: str):
+        return await asyncio.to_thread(self._get_with_ttl, key)
+
+    async def get(self, key: str):
+        return (await self.get_with_ttl(key))[1]
+
+    def _set(self, key: str, value: bytes, expires_at: Optional[float]):
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)", (key, value, expires_at)
+            )
+            self.writes += 1
+            if self.writes % self.prune_every == 0:
+                self.connection.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None):
+        expires_at = time.time() + expire if expire else None
+        await asyncio.to_thread(self._set, key, value, expires_at)
+
+    async def add(self, key: str, value: bytes, expire: float) -> bool:
+        """Set key only if it is absent (or expired); True when this caller set it."""
+        return await asyncio.to_thread(self._add, key, value, expire)
+
+    async def clear(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        if namespace:
+            sql, params = "DELETE FROM cache WHERE key LIKE ?", (f"{namespace}:%",)
+        elif key:
+            sql, params = "DELETE FROM cache WHERE key = ?", (key,)
+        else:
+            return 0
+        return await asyncio.to_thread(self._delete, sql, params)
+
+def build_cache_backend() -> Backend:
+    """Pick the backend from CACHE_BACKEND."""
+    if CACHE_BACKEND in ("redis", "fakeredis"):
+        from fastapi_cache.backends.redis import RedisBackend
+        if CACHE_BACKEND == "fakeredis":
+            # in-process stand-in with real Redis semantics (SET NX, expiry); for tests and demos
+            from fakeredis import FakeAsyncRedis
+            return RedisBackend(FakeAsyncRedis())
+        from redis.asyncio import from_url
+        return RedisBackend(from_url(REDIS_URL))
+    if CACHE_BACKEND == "memory":
+        return InMemoryBackend()  # per process: only correct with a single worker
+    return SQLiteBackend(CACHE_SQLITE_PATH)
+
+def canonical_cache_key(namespace: str, data: BaseModel) -> str:
+    """
+    Key built from the validated model, not the raw request body. Field order, whitespace, "10" vs
+    10.0 and -0.0 vs 0.0 all map to the same key.
+    """
+    fields = {
+        name: value + 0.0 if isinstance(value, float) else value
+        for name, value in data.dict().items()
+    }
+    canonical = json.dumps(fields, sort_keys=True, separators=(",", ":"))
+    return f"{namespace}:{MODEL_VERSION}:{hashlib.sha256(canonical.encode()).hexdigest()}"
+
+class SharedCache:
+    """
+    get-or-compute on top of the FastAPICache backend, with stampede protection.
+    - Concurrent misses for one key inside a worker share a single computation.
+    - Across workers, the first miss takes a short lock entry (SET NX) in the shared backend. The
+      others poll for its result instead of recomputing, and only compute themselves if the lock
+      expires first.
+    Hits, misses and coalesced requests are counted per worker for /cache/stats.
+    """
+    def __init__(self, lock_ttl_ms: int = CACHE_LOCK_TTL_MS, poll_interval_ms: int = 10):
+        self.lock_ttl = lock_ttl_ms / 1000
+        self.poll_interval = poll_interval_ms / 1000
+        self.inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @property
+    def backend(self) -> Backend:
+        return FastAPICache.get_backend()
+
+    async def _try_lock(self, lock_key: str) -> Tuple[bool, bool]:
+        """Return (may_compute, lock_written): only a written lock entry needs clearing afterwards."""
+        backend = self.backend
+        if hasattr(backend, "add"):
+            written = await backend.add(lock_key, b"1", self.lock_ttl)
+            return written, written
+        if hasattr(backend, "redis"):
+            written = bool(await backend.redis.set(lock_key, b"1", nx=True, px=int(self.lock_ttl * 1000)))
+            return written, written
+        return True, False  # a per-process backend has no other workers to coordinate with
+
+    async def _wait_for_value(self, key: str):
+        deadline = time.monotonic() + self.lock_ttl
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            cached = await self.backend.get(key)
+            if cached is not None:
+                return cached
+        return None
+
+    async def _compute(self, key: str, compute, expire: int) -> dict:
+        lock_key = f"{key}:lock"
+        may_compute, lock_written = await self._try_lock(lock_key)
+        if not may_compute:
+            cached = await self._wait_for_value(key)
+            if cached is not None:
+                self.coalesced += 1
+                return json.loads(cached)
+        self.misses += 1
+        try:
+            value = await compute()
+            await self.backend.set(key, json.dumps(value).encode(), expire)
+            return value
+        finally:
+            if lock_written:
+                await self.backend.clear(key=lock_key)
+
+    async def get_or_compute(self, key: str, compute, expire: int = CACHE_EXPIRE_SECONDS) -> dict:
+        """Return the cached JSON value for key, or await compute() once and cache its result."""
+        cached = await self.backend.get(key)
+        if cached is not None:
+            self.hits += 1
+            return json.loads(cached)
+        if key in self.inflight:
+            self.coalesced += 1
+            return await asyncio.shield(self.inflight[key])
+        task = asyncio.ensure_future(self._compute(key, compute, expire))
+        self.inflight[key] = task
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self.inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "pid": os.getpid(),
+            "backend": CACHE_BACKEND,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
+
+CACHE = SharedCache()
+
 @app.on_event("startup")
 async def startup():
     """
-    Initialize the cache backend on startup.
-    InMemoryBackend is fine for development. For production use RedisBackend (example below).
+    Initialize the shared cache backend and the micro-batcher on startup.
     """
-    FastAPICache.init(InMemoryBackend(), prefix="fastapi-cache")
-    print("INFO: FastAPICache initialized with InMemoryBackend (dev).")
+    FastAPICache.init(build_cache_backend(), prefix="fastapi-cache")
+    print(f"INFO: FastAPICache initialized with the {CACHE_BACKEND} backend.")
+    BATCHER.start()
+    print(f"INFO: MicroBatcher started (max {BATCHER.max_batch_size} items / {BATCH_MAX_WAIT_MS} ms).")
 
-    # Redis example (uncomment to use Redis):
-    # redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
-    # redis = from_url(redis_url, encoding="utf-8", decode_responses=True)
-    # FastAPICache.init(RedisBackend(redis), prefix="fastapi-cache")
-    # print(f"INFO: FastAPICache initialized with RedisBackend at {redis_url}.")
-    
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop the micro-batching task."""
+    await BATCHER.stop()
 
 
 # --------------------------------------------------------------------
-# 5. Prediction endpoint
+# 6. Prediction endpoints
 # --------------------------------------------------------------------
 @app.post("/predict", response_model=Prediction, status_code=status.HTTP_200_OK)
-@cache(expire=30)  # caches identical requests for 30 seconds
 async def predict(
     data: InputData,
-    model: MLModel = Depends(get_model),
+    batcher: MicroBatcher = Depends(get_batcher),
     api_key: str = Depends(verify_api_key) 
 ):
     """
     Prediction endpoint:
     - Validates input via Pydantic
     - Requires API key via verify_api_key dependency
-    - Uses model provided by get_model dependency
-    - Responses are cached for 'expire' seconds
+    - Predicts through the micro-batcher, together with concurrent requests
+    - Responses are cached in the shared backend for CACHE_EXPIRE_SECONDS, keyed by the validated input
     """
-    print(f"INFO: Processing prediction for {data.dict()}")
-    return model.predict(data)
\ No newline at end of file
+    async def compute():
+        return (await batcher.submit(data)).dict()
+
+    key = canonical_cache_key(f"{FastAPICache.get_prefix()}:predict", data)
+    return Prediction(**await CACHE.get_or_compute(key, compute))
+
+@app.post("/predict/batch", response_model=List[Prediction], status_code=status.HTTP_200_OK)
+async def predict_batch(
+    data: List[InputData],
+    model: MLModel = Depends(get_model),
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Batch prediction endpoint:
+    - Accepts a JSON array of inputs and returns predictions in the same order
+    - The array is already a batch, so it goes straight to one vectorized model call
+    """
+    if len(data) > PREDICT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {PREDICT_BATCH_MAX_ITEMS} inputs per batch."
+        )
+    if not data:
+        return []
+    return await asyncio.to_thread(model.predict_batch, data)
+
+@app.get("/cache/stats")
+async def cache_stats(api_key: str = Depends(verify_api_key)):
+    """Hit/miss counters of the worker that serves this request."""
+    return CACHE.stats()
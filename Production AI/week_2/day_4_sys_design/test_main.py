@@ -0,0 +1,48 @@
+# test_main.py
+"""
+Tests for the shared /predict cache. Run with: pytest test_main.py
+"""
+
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+HEADERS = {"X-API-Key": main.API_KEY}
+
+
+@pytest.fixture
+def memory_client(monkeypatch):
+    monkeypatch.setattr(main, "CACHE_BACKEND", "memory")
+    monkeypatch.setattr(main, "CACHE", main.SharedCache())
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_predict_with_memory_backend_caches_misses(memory_client):
+    body = {"feature1": 1.5, "feature2": 2.0}
+
+    first = memory_client.post("/predict", json=body, headers=HEADERS)
+    second = memory_client.post("/predict", json=body, headers=HEADERS)
+
+    assert first.status_code == 200
+    assert second.json() == first.json()
+    stats = memory_client.get("/cache/stats", headers=HEADERS).json()
+    assert (stats["misses"], stats["hits"]) == (1, 1)
+
+
+def test_sqlite_backend_prunes_expired_rows(tmp_path):
+    backend = main.SQLiteBackend(str(tmp_path / "cache.sqlite3"), prune_every=5)
+
+    async def fill():
+        for i in range(4):
+            await backend.set(f"old:{i}", b"1", expire=1)
+        time.sleep(1.1)
+        await backend.set("fresh", b"1", expire=60)  # fifth write triggers the sweep
+
+    asyncio.run(fill())
+    keys = [key for (key,) in backend._execute("SELECT key FROM cache")]
+    assert keys == ["fresh"]
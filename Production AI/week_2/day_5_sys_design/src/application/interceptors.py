@@ -0,0 +1,302 @@
+import time, uuid, logging, asyncio, contextvars, grpc
+from pydantic import ValidationError
+from src.application.metrics import worker_metrics
+
+
+_LOGGER = logging.getLogger(__name__)
+
+# probes should not count as load, or a busy health checker would report itself as traffic
+_UNTRACKED_METHODS = ("HealthCheck",)
+
+REQUEST_ID_HEADER = "x-request-id"
+request_id_var = contextvars.ContextVar("request_id", default="-")
+
+# most specific first; anything unlisted becomes INTERNAL
+_EXCEPTION_STATUS_CODES = (
+    (ValidationError, grpc.StatusCode.INVALID_ARGUMENT),
+    (ValueError, grpc.StatusCode.INVALID_ARGUMENT),
+    (LookupError, grpc.StatusCode.NOT_FOUND),
+    (PermissionError, grpc.StatusCode.PERMISSION_DENIED),
+    (NotImplementedError, grpc.StatusCode.UNIMPLEMENTED),
+    (TimeoutError, grpc.StatusCode.DEADLINE_EXCEEDED),
+    (asyncio.TimeoutError, grpc.StatusCode.DEADLINE_EXCEEDED),
+)
+
+
+class RequestIdFilter(logging.Filter):
+
+    """Adds the current RPC's request id to log records as `%(request_id)s`"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+def status_code_for(exception: Exception) -> grpc.StatusCode:
+    for exception_type, code in _EXCEPTION_STATUS_CODES:
+        if isinstance(exception, exception_type):
+            return code
+    return grpc.StatusCode.INTERNAL
+
+def _method_name(handler_call_details) -> str:
+    return handler_call_details.method.rsplit("/", 1)[-1]
+
+def _request_id(context) -> str:
+    for key, value in context.invocation_metadata() or ():
+        if key == REQUEST_ID_HEADER:
+            return value
+    return uuid.uuid4().hex
+
+def _payload_size(message) -> int:
+    return message.ByteSize() if hasattr(message, "ByteSize") else 0
+
+def _code_name(context, default: str) -> str:
+    code = context.code()
+    return code.name if isinstance(code, grpc.StatusCode) else default
+
+def _wrap_rpc_handler(handler, unary_wrapper, stream_wrapper):
+    """Rebuild an RpcMethodHandler with its behavior wrapped, keeping the (de)serializers"""
+
+    if handler is None:
+        return None
+
+    serializers = dict(
+        request_deserializer=handler.request_deserializer,
+        response_serializer=handler.response_serializer
+    )
+    if handler.unary_unary:
+        return grpc.unary_unary_rpc_method_handler(unary_wrapper(handler.unary_unary), **serializers)
+    if handler.unary_stream:
+        return grpc.unary_stream_rpc_method_handler(stream_wrapper(handler.unary_stream), **serializers)
+    if handler.stream_unary:
+        return grpc.stream_unary_rpc_method_handler(unary_wrapper(handler.stream_unary), **serializers)
+    return grpc.stream_stream_rpc_method_handler(stream_wrapper(handler.stream_stream), **serializers)
+
+
+class _ServerInterceptor(grpc.ServerInterceptor):
+
+    """Base for the thread-pool server: subclasses wrap unary and streaming behaviors"""
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        method = _method_name(handler_call_details)
+        return _wrap_rpc_handler(
+            handler, lambda behavior: self.unary(behavior, method), lambda behavior: self.stream(behavior, method)
+        )
+
+
+class _AsyncServerInterceptor(grpc.aio.ServerInterceptor):
+
+    """Base for the grpc.aio server: subclasses wrap unary and streaming coroutines"""
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        method = _method_name(handler_call_details)
+        return _wrap_rpc_handler(
+            handler, lambda behavior: self.unary(behavior, method), lambda behavior: self.stream(behavior, method)
+        )
+
+
+class RequestIdInterceptor(_ServerInterceptor):
+
+    """Takes `x-request-id` from the call metadata (or mints one), exposes it to logs and echoes it back"""
+
+    def unary(self, behavior, method):
+        def wrapper(request, context):
+            request_id = _request_id(context)
+            token = request_id_var.set(request_id)
+            context.set_trailing_metadata(((REQUEST_ID_HEADER, request_id),))
+            try:
+                return behavior(request, context)
+            finally:
+                request_id_var.reset(token)
+        return wrapper
+
+    def stream(self, behavior, method):
+        def wrapper(request, context):
+            request_id = _request_id(context)
+            token = request_id_var.set(request_id)
+            context.set_trailing_metadata(((REQUEST_ID_HEADER, request_id),))
+            try:
+                yield from behavior(request, context)
+            finally:
+                request_id_var.reset(token)
+        return wrapper
+
+
+class AsyncRequestIdInterceptor(_AsyncServerInterceptor):
+
+    def unary(self, behavior, method):
+        async def wrapper(request, context):
+            # each aio RPC runs in its own task, so the context var never leaks between calls
+            request_id = _request_id(context)
+            request_id_var.set(request_id)
+            context.set_trailing_metadata(((REQUEST_ID_HEADER, request_id),))
+            return await behavior(request, context)
+        return wrapper
+
+    def stream(self, behavior, method):
+        async def wrapper(request, context):
+            request_id = _request_id(context)
+            request_id_var.set(request_id)
+            context.set_trailing_metadata(((REQUEST_ID_HEADER, request_id),))
+            async for response in behavior(request, context):
+                yield response
+        return wrapper
+
+
+class MetricsInterceptor(_ServerInterceptor):
+
+    """Records in-flight count, latency, payload sizes and status code per method into `worker_metrics`"""
+
+    def intercept_service(self, continuation, handler_call_details):
+        if _method_name(handler_call_details) in _UNTRACKED_METHODS:
+            return continuation(handler_call_details)
+        return super().intercept_service(continuation, handler_call_details)
+
+    def unary(self, behavior, method):
+        def wrapper(request, context):
+            start_time = time.perf_counter()
+            worker_metrics.started()
+            code, response_bytes = "UNKNOWN", 0
+            try:
+                response = behavior(request, context)
+                code, response_bytes = _code_name(context, "OK"), _payload_size(response)
+                return response
+            except Exception:
+                code = _code_name(context, "UNKNOWN")
+                raise
+            finally:
+                worker_metrics.finished(
+                    method, (time.perf_counter() - start_time) * 1000, code, _payload_size(request), response_bytes
+                )
+        return wrapper
+
+    def stream(self, behavior, method):
+        def wrapper(request, context):
+            start_time = time.perf_counter()
+            worker_metrics.started()
+            code, response_bytes = "CANCELLED", 0
+            try:
+                for response in behavior(request, context):
+                    response_bytes += _payload_size(response)
+                    yield response
+                code = _code_name(context, "OK")
+            except Exception:
+                code = _code_name(context, "UNKNOWN")
+                raise
+            finally:
+                worker_metrics.finished(
+                    method, (time.perf_counter() - start_time) * 1000, code, _payload_size(request), response_bytes
+                )
+        return wrapper
+
+
+class AsyncMetricsInterceptor(_AsyncServerInterceptor):
+
+    async def intercept_service(self, continuation, handler_call_details):
+        if _method_name(handler_call_details) in _UNTRACKED_METHODS:
+            return await continuation(handler_call_details)
+        return await super().intercept_service(continuation, handler_call_details)
+
+    def unary(self, behavior, method):
+        async def wrapper(request, context):
+            start_time = time.perf_counter()
+            worker_metrics.started()
+            code, response_bytes = "UNKNOWN", 0
+            try:
+                response = await behavior(request, context)
+                code, response_bytes = _code_name(context, "OK"), _payload_size(response)
+                return response
+            except Exception:
+                code = _code_name(context, "UNKNOWN")
+                raise
+            finally:
+                worker_metrics.finished(
+                    method, (time.perf_counter() - start_time) * 1000, code, _payload_size(request), response_bytes
+                )
+        return wrapper
+
+    def stream(self, behavior, method):
+        async def wrapper(request, context):
+            start_time = time.perf_counter()
+            worker_metrics.started()
+            code, response_bytes = "CANCELLED", 0
+            try:
+                async for response in behavior(request, context):
+                    response_bytes += _payload_size(response)
+                    yield response
+                code = _code_name(context, "OK")
+            except Exception:
+                code = _code_name(context, "UNKNOWN")
+                raise
+            finally:
+                worker_metrics.finished(
+                    method, (time.perf_counter() - start_time) * 1000, code, _payload_size(request), response_bytes
+                )
+        return wrapper
+
+
+class ExceptionToStatusInterceptor(_ServerInterceptor):
+
+    """Turns exceptions escaping a servicer into a gRPC status instead of a bare UNKNOWN"""
+
+    def unary(self, behavior, method):
+        def wrapper(request, context):
+            try:
+                return behavior(request, context)
+            except Exception as e:
+                if isinstance(context.code(), grpc.StatusCode):
+                    raise  # the servicer already aborted with its own status
+                _LOGGER.exception(f"{method} failed")
+                context.abort(status_code_for(e), f"{type(e).__name__}: {e}")
+        return wrapper
+
+    def stream(self, behavior, method):
+        def wrapper(request, context):
+            try:
+                yield from behavior(request, context)
+            except Exception as e:
+                if isinstance(context.code(), grpc.StatusCode):
+                    raise
+                _LOGGER.exception(f"{method} failed")
+                context.abort(status_code_for(e), f"{type(e).__name__}: {e}")
+        return wrapper
+
+
+class AsyncExceptionToStatusInterceptor(_AsyncServerInterceptor):
+
+    def unary(self, behavior, method):
+        async def wrapper(request, context):
+            try:
+                return await behavior(request, context)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if isinstance(context.code(), grpc.StatusCode):
+                    raise
+                _LOGGER.exception(f"{method} failed")
+                await context.abort(status_code_for(e), f"{type(e).__name__}: {e}")
+        return wrapper
+
+    def stream(self, behavior, method):
+        async def wrapper(request, context):
+            try:
+                async for response in behavior(request, context):
+                    yield response
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if isinstance(context.code(), grpc.StatusCode):
+                    raise
+                _LOGGER.exception(f"{method} failed")
+                await context.abort(status_code_for(e), f"{type(e).__name__}: {e}")
+        return wrapper
+
+
+def server_interceptors() -> list:
+    # outermost first: the request id is set before anything logs, and metrics see the mapped status code
+    return [RequestIdInterceptor(), MetricsInterceptor(), ExceptionToStatusInterceptor()]
+
+def aio_server_interceptors() -> list:
+    return [AsyncRequestIdInterceptor(), AsyncMetricsInterceptor(), AsyncExceptionToStatusInterceptor()]
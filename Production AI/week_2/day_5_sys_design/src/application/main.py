@@ -1,83 +1,200 @@
-import os,logging, asyncio,sys,platform,multiprocessing,time,grpc,datetime
+import os,logging, asyncio,sys,platform,multiprocessing,signal,threading,grpc
 from concurrent import futures
-# from grpc_interceptor import ExceptionToStatusInterceptor
-from src.application.service import AgenticServerBaseService
+from src.application.service import AgenticServerBaseService, AgenticServerAsyncBaseService
+from src.application.interceptors import RequestIdFilter, server_interceptors, aio_server_interceptors
+from src.application.metrics import worker_metrics, start_metrics_server
 from src.pb.server_pb2_grpc import add_AgenticServerServicer_to_server
 from src.config.appconfig import env_config
 
 
 _LOGGER = logging.getLogger(__name__)
-_PROCESS_COUNT = multiprocessing.cpu_count()
-_ONE_DAY = datetime.timedelta(days=1)
+_PROCESS_COUNT = env_config.worker_processes
+# Ctrl+C reaches every process in the group, so workers drain on SIGINT exactly as on SIGTERM
+_SHUTDOWN_SIGNALS = (signal.SIGTERM, signal.SIGINT)
 
 class AgenticServerService(AgenticServerBaseService):
     pass
 
-def _wait_forever(server):
-    try:
-        while True:
-            time.sleep(_ONE_DAY.total_seconds())
-    except KeyboardInterrupt:
-        server.stop(None)
+class AgenticServerAsyncService(AgenticServerAsyncBaseService):
+    pass
 
-def create_server(bind_address:str):
-    interceptors = [] #[ExceptionToStatusInterceptor()]
-    if platform.system() == "Windows":
-        server = grpc.server(
-            futures.ThreadPoolExecutor(max_workers=1),  # Increased worker threads instead of processes
-            interceptors=interceptors
-        )
-    else:
-        options = (("grpc.so_reuseport", 1),)
-        server = grpc.server(
-            futures.ThreadPoolExecutor(max_workers=10), interceptors=interceptors,
-            options=options,
-        )
+def _reset_worker_signals():
+    # forked workers inherit the supervisor's handlers, which would only set the parent's events copied
+    # into this process; drop them before anything else, and leave SIGHUP (hot restart) to the supervisor
+    for signum in _SHUTDOWN_SIGNALS:
+        signal.signal(signum, signal.SIG_DFL)
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+def _install_shutdown_handler(callback):
+    for signum in _SHUTDOWN_SIGNALS:
+        signal.signal(signum, lambda signum, frame: callback())
+
+def _wait_for_shutdown(server, stop_requested):
+    while not stop_requested.wait(1):
+        pass
+    # stop() refuses new RPCs at once; calls still running when the grace period ends are cancelled
+    _LOGGER.info(f"Draining in-flight RPCs (grace {env_config.shutdown_grace_secs}s)")
+    server.stop(env_config.shutdown_grace_secs).wait()
+    _LOGGER.info("Server stopped gracefully")
+
+def _start_worker_metrics(worker_index:int):
+    if env_config.metrics_port:
+        port = env_config.metrics_port + worker_index
+        start_metrics_server(port)
+        _LOGGER.info(f"Worker metrics on http://127.0.0.1:{port}/metrics")
+
+def create_server(bind_address:str, worker_index:int = 0, ready=None):
+    _reset_worker_signals()
+    # installed before the server starts, so a drain signal during startup is not lost
+    stop_requested = threading.Event()
+    _install_shutdown_handler(stop_requested.set)
+    interceptors = server_interceptors()
+    max_workers = env_config.worker_threads
+    executor = futures.ThreadPoolExecutor(max_workers=max_workers)
+    # past maximum_concurrent_rpcs grpc rejects new calls with RESOURCE_EXHAUSTED instead of queueing them
+    server = grpc.server(
+        executor, interceptors=interceptors,
+        options=env_config.server_options(),
+        maximum_concurrent_rpcs=env_config.max_concurrent_rpcs,
+    )
+    # RPCs beyond max_workers wait in the executor queue; that backlog is this worker's queue depth
+    worker_metrics.configure(
+        capacity=max_workers,
+        max_queue_depth=env_config.overload_queue_depth,
+        queue_depth_fn=executor._work_queue.qsize
+    )
+    _start_worker_metrics(worker_index)
     add_AgenticServerServicer_to_server(AgenticServerService(), server)
     server.add_insecure_port(bind_address)
     server.start()
-    try:
-        # Keep the server running
-        _wait_forever(server)
-    except KeyboardInterrupt:
-        server.stop(0)
-        _LOGGER.info("Server stopped gracefully")
+    if ready is not None:
+        ready.set()
+    # Keep the server running until SIGTERM/SIGINT, then drain
+    _wait_for_shutdown(server, stop_requested)
+
+async def _serve_aio(bind_address:str, ready=None):
+    stop_requested = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    _install_shutdown_handler(lambda: loop.call_soon_threadsafe(stop_requested.set))
+    interceptors = aio_server_interceptors()
+    server = grpc.aio.server(
+        interceptors=interceptors,
+        options=env_config.server_options(),
+        maximum_concurrent_rpcs=env_config.max_concurrent_rpcs,
+    )
+    add_AgenticServerServicer_to_server(AgenticServerAsyncService(), server)
+    server.add_insecure_port(bind_address)
+    await server.start()
+    _LOGGER.info(f"Asyncio server listening on {bind_address}")
+    if ready is not None:
+        ready.set()
+    await stop_requested.wait()
+    _LOGGER.info(f"Draining in-flight RPCs (grace {env_config.shutdown_grace_secs}s)")
+    await server.stop(env_config.shutdown_grace_secs)
+    _LOGGER.info("Server stopped gracefully")
+
+def create_aio_server(bind_address:str, worker_index:int = 0, ready=None):
+    _reset_worker_signals()
+    # one event loop per forked worker; RPCs are coroutines, so no thread is pinned per call
+    worker_metrics.configure(
+        capacity=env_config.max_concurrent_rpcs or env_config.aio_max_in_flight, max_queue_depth=0
+    )
+    _start_worker_metrics(worker_index)
+    asyncio.run(_serve_aio(bind_address, ready))
 
 
 
+def _spawn_workers(target, bind_address:str) -> list:
+    workers = []
+    for worker_index in range(_PROCESS_COUNT):
+        # NOTE: It is imperative that the worker subprocesses be forked before
+        # any gRPC servers start up. See
+        # https://github.com/grpc/grpc/issues/16001 for more details.
+        ready = multiprocessing.Event()
+        worker = multiprocessing.Process(
+            target=target, args=(bind_address, worker_index, ready)
+        )
+        worker.start()
+        worker.ready = ready
+        workers.append(worker)
+    return workers
+
+def _wait_until_ready(workers:list) -> bool:
+    timeout = env_config.worker_ready_timeout_secs
+    return all(worker.ready.wait(timeout) and worker.is_alive() for worker in workers)
+
+def _stop_workers(workers:list):
+    """SIGTERM every worker, give them the grace period to drain, then kill stragglers"""
+    for worker in workers:
+        if worker.is_alive():
+            worker.terminate()
+    for worker in workers:
+        worker.join(env_config.shutdown_grace_secs + 5)
+        if worker.is_alive():
+            _LOGGER.warning(f"Worker {worker.pid} did not drain in time, killing it")
+            worker.kill()
+            worker.join()
+
+def _hot_restart(target, bind_address:str, workers:list) -> list:
+    """
+    Start a new generation of workers next to the old one (SO_REUSEPORT lets both bind the port) and
+    drain the old generation only once every new worker is serving, so a deploy never loses capacity.
+    """
+    _LOGGER.info("Hot restart: starting new workers")
+    new_workers = _spawn_workers(target, bind_address)
+    if not _wait_until_ready(new_workers):
+        _LOGGER.error("Hot restart aborted: new workers did not become ready, keeping the old ones")
+        _stop_workers(new_workers)
+        return workers
+    _LOGGER.info(f"Hot restart: new workers {[worker.pid for worker in new_workers]} ready, draining the old ones")
+    _stop_workers(workers)
+    return new_workers
+
+def _supervise(target, bind_address:str):
+    """Parent loop: SIGTERM/SIGINT drains all workers and exits, SIGHUP hot-restarts them"""
+    shutdown_requested, restart_requested = threading.Event(), threading.Event()
+    for signum in _SHUTDOWN_SIGNALS:
+        signal.signal(signum, lambda signum, frame: shutdown_requested.set())
+    signal.signal(signal.SIGHUP, lambda signum, frame: restart_requested.set())
+
+    workers = _spawn_workers(target, bind_address)
+    while any(worker.is_alive() for worker in workers):
+        if shutdown_requested.wait(1):
+            break
+        if restart_requested.is_set():
+            restart_requested.clear()
+            workers = _hot_restart(target, bind_address, workers)
+    _LOGGER.info("Shutting down: draining workers")
+    _stop_workers(workers)
+
+
 def main():
     _LOGGER.info(f"Server active and waiting")
     port = int(env_config.port)
     sys.stdout.flush()
 
     bind_address = "0.0.0.0:{}".format(port)
+    target = create_aio_server if env_config.server_mode == "aio" else create_server
 
     if platform.system() == "Windows":
         # Create and start server
-        worker = multiprocessing.Process(target=create_server, args=(bind_address,))
+        worker = multiprocessing.Process(target=target, args=(bind_address, 0))
         worker.start()
         worker.join()
     else:
-        workers = []
-        for _ in range(_PROCESS_COUNT):
-            # NOTE: It is imperative that the worker subprocesses be forked before
-            # any gRPC servers start up. See
-            # https://github.com/grpc/grpc/issues/16001 for more details.
-            worker = multiprocessing.Process(
-                target=create_server, args=(bind_address,)
-            )
-            worker.start()
-            workers.append(worker)
-        for worker in workers:
-            worker.join()
-        _LOGGER.info(f"Server started successfully on port {port}")
+        _LOGGER.info(f"Server started on port {port}; SIGHUP hot-restarts the workers, SIGTERM drains them")
+        _supervise(target, bind_address)
 
 
 if __name__ == "__main__":
     handler = logging.StreamHandler(sys.stdout)
-    formatter = logging.Formatter("[PID %(process)d] %(message)s")
+    formatter = logging.Formatter("[PID %(process)d] [%(request_id)s] %(message)s")
     handler.setFormatter(formatter)
-    _LOGGER.addHandler(handler)
-    _LOGGER.setLevel(logging.INFO)
+    handler.addFilter(RequestIdFilter())
+    # on the root logger so service and interceptor logs carry the request id too
+    root_logger = logging.getLogger()
+    root_logger.addHandler(handler)
+    root_logger.setLevel(logging.INFO)
     _LOGGER.info(f"Server starting...")
-    asyncio.run(main())
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,160 @@
+import os, json, time, bisect, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# latency histogram bucket upper bounds in milliseconds; the last bucket catches everything slower
+_LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, float("inf"))
+
+
+class LatencyHistogram:
+
+    def __init__(self):
+        self.counts = [0] * len(_LATENCY_BUCKETS_MS)
+        self.total = 0
+        self.sum_ms = 0.0
+
+    def observe(self, latency_ms: float):
+        self.counts[bisect.bisect_left(_LATENCY_BUCKETS_MS, latency_ms)] += 1
+        self.total += 1
+        self.sum_ms += latency_ms
+
+    def percentile(self, pct: float) -> float:
+        """Upper bound of the bucket holding the pct-th observation"""
+        if not self.total:
+            return 0.0
+        rank = pct / 100 * self.total
+        seen = 0
+        for bound, count in zip(_LATENCY_BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound if bound != float("inf") else _LATENCY_BUCKETS_MS[-2]
+        return _LATENCY_BUCKETS_MS[-2]
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.total,
+            "mean_ms": round(self.sum_ms / self.total, 2) if self.total else 0.0,
+            "p50_ms": self.percentile(50),
+            "p99_ms": self.percentile(99),
+            "buckets": {str(bound): count for bound, count in zip(_LATENCY_BUCKETS_MS, self.counts)},
+        }
+
+
+class WorkerMetrics:
+
+    """
+    Load figures for one server process: RPCs in flight, requests queued for a worker thread and, per
+    method, a latency histogram, status code counts and payload bytes. `status()` turns them into
+    "healthy" or "overloaded" for HealthCheck.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.total_requests = 0
+        self.histograms = {}
+        self.status_codes = {}
+        self.payload_bytes = {}
+        self.capacity = 0
+        self.max_queue_depth = 0
+        self._queue_depth_fn = None
+
+    def configure(self, capacity: int, max_queue_depth: int, queue_depth_fn=None):
+        self.capacity = capacity
+        self.max_queue_depth = max_queue_depth
+        self._queue_depth_fn = queue_depth_fn
+
+    def started(self):
+        with self._lock:
+            self.in_flight += 1
+            self.total_requests += 1
+
+    def finished(self, method: str, latency_ms: float, code: str = "OK", request_bytes: int = 0, response_bytes: int = 0):
+        with self._lock:
+            self.in_flight -= 1
+            self.histograms.setdefault(method, LatencyHistogram()).observe(latency_ms)
+            codes = self.status_codes.setdefault(method, {})
+            codes[code] = codes.get(code, 0) + 1
+            payload = self.payload_bytes.setdefault(method, {"request_bytes": 0, "response_bytes": 0})
+            payload["request_bytes"] += request_bytes
+            payload["response_bytes"] += response_bytes
+
+    def queue_depth(self) -> int:
+        return self._queue_depth_fn() if self._queue_depth_fn else 0
+
+    def status(self) -> str:
+        overloaded = (
+            (self.capacity and self.in_flight >= self.capacity)
+            or (self.max_queue_depth and self.queue_depth() >= self.max_queue_depth)
+        )
+        return "overloaded" if overloaded else "healthy"
+
+    def overall_latency(self) -> LatencyHistogram:
+        combined = LatencyHistogram()
+        with self._lock:
+            for histogram in self.histograms.values():
+                combined.counts = [a + b for a, b in zip(combined.counts, histogram.counts)]
+                combined.total += histogram.total
+                combined.sum_ms += histogram.sum_ms
+        return combined
+
+    def snapshot(self) -> dict:
+        overall = self.overall_latency()
+        with self._lock:
+            methods = {
+                method: {
+                    **histogram.to_dict(),
+                    "status_codes": dict(self.status_codes.get(method, {})),
+                    **self.payload_bytes.get(method, {}),
+                }
+                for method, histogram in self.histograms.items()
+            }
+        return {
+            "pid": os.getpid(),
+            "status": self.status(),
+            "in_flight": self.in_flight,
+            "capacity": self.capacity,
+            "queue_depth": self.queue_depth(),
+            "total_requests": self.total_requests,
+            "p50_ms": overall.percentile(50),
+            "p99_ms": overall.percentile(99),
+            "methods": methods,
+        }
+
+
+# one instance per process; each forked worker reports only its own load
+worker_metrics = WorkerMetrics()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = json.dumps(worker_metrics.snapshot()).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1"):
+    """
+    Serve this worker's metrics as JSON on http://host:port/metrics from a daemon thread. During a hot
+    restart the draining predecessor still holds the port, so binding is retried until it is released.
+    """
+    def serve():
+        while True:
+            try:
+                server = ThreadingHTTPServer((host, port), _MetricsHandler)
+                break
+            except OSError:
+                time.sleep(1)
+        server.serve_forever()
+
+    threading.Thread(target=serve, name="metrics-http", daemon=True).start()
@@ -1,29 +1,135 @@
-from grpc import StatusCode
-# from grcp_interceptor.exceptions import NotFound, GrpcException
+import asyncio, logging
+from concurrent import futures
 from src.pb.server_pb2_grpc import AgenticServerServicer
-from src.pb.server_pb2 import ChatRequest,ChatResponse,HealthCheckRequest,HealthCheckResponse
+from src.pb.server_pb2 import ChatRequest,ChatResponse,ChatChunk,ChatBatchItem,ChatBatchResponse,HealthCheckRequest,HealthCheckResponse
 from src.application.chatdatamodel import ChatRequest
+from src.services.chatagent import call_agent, stream_agent, astream_agent
+from src.config.appconfig import env_config
+from src.application.metrics import worker_metrics
+
+
+_LOGGER = logging.getLogger(__name__)
+
+def _health_check_response():
+    snapshot = worker_metrics.snapshot()
+    return HealthCheckResponse(
+        status=snapshot["status"],
+        pid=snapshot["pid"],
+        in_flight=snapshot["in_flight"],
+        capacity=snapshot["capacity"],
+        queue_depth=snapshot["queue_depth"],
+        total_requests=snapshot["total_requests"],
+        p50_ms=snapshot["p50_ms"],
+        p99_ms=snapshot["p99_ms"]
+    )
+
+def _batch_item(index, result=None, error=None):
+    if error is not None:
+        return ChatBatchItem(index=index, status=500, error=f"{type(error).__name__}: {error}")
+    return ChatBatchItem(index=index, status=200, message=result)
+
 
 class AgenticServerBaseService(AgenticServerServicer):
 
+    # shared by all ChatBatch calls in the process, so concurrent batches stay within one bound
+    _batch_executor = futures.ThreadPoolExecutor(max_workers=env_config.batch_max_concurrency)
+
     def Chat(self,request,context):
-        try:
-            chatRequest = ChatRequest(
-                name = request.name,
-                message= request.message,
-                location=request.location
+        # errors propagate; ExceptionToStatusInterceptor turns them into INVALID_ARGUMENT, INTERNAL, ...
+        chatRequest = ChatRequest(
+            name = request.name,
+            message= request.message,
+            location=request.location
+        )
+        _LOGGER.info(f"Chat request from {chatRequest.name}")
+        # your chatbot logic happened here
+        call_agent(chatRequest)
+        return ChatResponse(status=200, message="hello")
+
+    def ChatStream(self, request, context):
+        chatRequest = ChatRequest(
+            name = request.name,
+            message= request.message,
+            location=request.location
+        )
+        index = 0
+        for token in stream_agent(chatRequest):
+            yield ChatChunk(token=token, index=index)
+            index += 1
+        yield ChatChunk(index=index, done=True)
+
+    def ChatBatch(self, request, context):
+        # fan out across the bounded pool; results come back in request order, one failure never fails the batch
+        submitted = [
+            self._batch_executor.submit(
+                call_agent,
+                ChatRequest(name=item.name, message=item.message, location=item.location)
             )
-            print("chatRequest came here",chatRequest)
-            # your chatbot logic happened here
-            call_agent(chatRequest)
-            return ChatResponse(status=200, message="hello")
-        except Exception as e:
-            print(e)
-            # raise GrpcException(
-            #     status_code = StatusCode.INTERNAL,
-            #     details=f"Internal server error occurred:{e}"
-            # )
+            for item in request.requests
+        ]
+        results = []
+        for index, future in enumerate(submitted):
+            try:
+                results.append(_batch_item(index, result=future.result()))
+            except Exception as e:
+                results.append(_batch_item(index, error=e))
+        return ChatBatchResponse(results=results)
 
     def HealthCheck(self, request, context):
-        return HealthCheckResponse(status="healthy")
-        
\ No newline at end of file
+        return _health_check_response()
+
+
+class AgenticServerAsyncBaseService(AgenticServerServicer):
+
+    """
+    Servicer for the grpc.aio server. Every RPC is a coroutine on the worker's event loop, so a chat
+    waiting on the model holds no thread and one process can serve thousands of concurrent chats.
+    """
+
+    # shared by all ChatBatch calls on this servicer, like the sync executor; created on first use
+    # so it belongs to the server's running loop
+    _batch_semaphore = None
+
+    def _get_batch_semaphore(self):
+        if self._batch_semaphore is None:
+            self._batch_semaphore = asyncio.Semaphore(env_config.batch_max_concurrency)
+        return self._batch_semaphore
+
+    async def Chat(self, request, context):
+        chatRequest = ChatRequest(
+            name = request.name,
+            message= request.message,
+            location=request.location
+        )
+        tokens = [token async for token in astream_agent(chatRequest)]
+        return ChatResponse(status=200, message="".join(tokens).strip())
+
+    async def ChatStream(self, request, context):
+        chatRequest = ChatRequest(
+            name = request.name,
+            message= request.message,
+            location=request.location
+        )
+        index = 0
+        async for token in astream_agent(chatRequest):
+            yield ChatChunk(token=token, index=index)
+            index += 1
+        yield ChatChunk(index=index, done=True)
+
+    async def ChatBatch(self, request, context):
+        semaphore = self._get_batch_semaphore()
+
+        async def run(index, item):
+            chatRequest = ChatRequest(name=item.name, message=item.message, location=item.location)
+            async with semaphore:
+                try:
+                    tokens = [token async for token in astream_agent(chatRequest)]
+                    return _batch_item(index, result="".join(tokens).strip())
+                except Exception as e:
+                    return _batch_item(index, error=e)
+
+        results = await asyncio.gather(*(run(index, item) for index, item in enumerate(request.requests)))
+        return ChatBatchResponse(results=results)
+
+    async def HealthCheck(self, request, context):
+        return _health_check_response()
@@ -1,6 +1,6 @@
 from dotenv import load_dotenv
-load_dotenv(override=True)
-import os
+load_dotenv()  # real environment variables win, so tools like loadgen can override .env
+import os, platform
 
 
 
@@ -11,6 +11,31 @@ class EnvConfig:
         self.env = os.getenv("ENVIRONMENT")
         self.port = os.getenv("PORT")
         self.google_api_key = os.getenv("GOOGLE_API_KEY")
+        self.server_mode = os.getenv("SERVER_MODE", "sync").lower()   # "sync" thread-pool server or "aio" asyncio server
+        self.batch_max_concurrency = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))  # ChatBatch items processed at once
+        self.metrics_port = int(os.getenv("METRICS_PORT", "9100"))          # worker N serves metrics on METRICS_PORT+N; 0 disables
+        self.overload_queue_depth = int(os.getenv("OVERLOAD_QUEUE_DEPTH", "10"))  # queued RPCs at which a worker reports overloaded
+        self.aio_max_in_flight = int(os.getenv("AIO_MAX_IN_FLIGHT", "1000"))      # in-flight RPCs at which an aio worker reports overloaded
+
+        # server topology: processes x threads, and the limits past which RPCs are shed with RESOURCE_EXHAUSTED
+        self.worker_processes = int(os.getenv("WORKER_PROCESSES", "0")) or os.cpu_count()
+        self.worker_threads = int(os.getenv("WORKER_THREADS", "10"))              # thread pool per process (sync server)
+        self.max_concurrent_rpcs = int(os.getenv("MAX_CONCURRENT_RPCS", "0")) or None  # per process; unset means unbounded
+        self.max_receive_message_mb = int(os.getenv("MAX_RECEIVE_MESSAGE_MB", "4"))
+        self.max_send_message_mb = int(os.getenv("MAX_SEND_MESSAGE_MB", "4"))
+
+        # shutdown: SIGTERM drains in-flight RPCs for up to the grace period; SIGHUP hot-restarts the workers
+        self.shutdown_grace_secs = float(os.getenv("SHUTDOWN_GRACE_SECS", "30"))
+        self.worker_ready_timeout_secs = float(os.getenv("WORKER_READY_TIMEOUT_SECS", "30"))  # new workers must be serving by then
+
+    def server_options(self) -> list:
+        options = [
+            ("grpc.max_receive_message_length", self.max_receive_message_mb * 1024 * 1024),
+            ("grpc.max_send_message_length", self.max_send_message_mb * 1024 * 1024),
+        ]
+        if platform.system() != "Windows":
+            options.append(("grpc.so_reuseport", 1))
+        return options
 
 
 # Create an instance of ENvConfig to be able to access all environment variable
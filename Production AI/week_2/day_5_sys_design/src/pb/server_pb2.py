@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0cserver.proto\x12\x0e\x61gentic_server\">\n\x0b\x43hatRequest\x12\x0f\n\x07message\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x10\n\x08location\x18\x03 \x01(\t\"/\n\x0c\x43hatResponse\x12\x0e\n\x06status\x18\x01 \x01(\x05\x12\x0f\n\x07message\x18\x02 \x01(\t\"\x14\n\x12HealthCheckRequest\"%\n\x13HealthCheckResponse\x12\x0e\n\x06status\x18\x01 \x01(\t2\xae\x01\n\rAgenticServer\x12\x43\n\x04\x43hat\x12\x1b.agentic_server.ChatRequest\x1a\x1c.agentic_server.ChatResponse\"\x00\x12X\n\x0bHealthCheck\x12\".agentic_server.HealthCheckRequest\x1a#.agentic_server.HealthCheckResponse\"\x00\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0cserver.proto\x12\x0e\x61gentic_server\">\n\x0b\x43hatRequest\x12\x0f\n\x07message\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x10\n\x08location\x18\x03 \x01(\t\"/\n\x0c\x43hatResponse\x12\x0e\n\x06status\x18\x01 \x01(\x05\x12\x0f\n\x07message\x18\x02 \x01(\t\"7\n\tChatChunk\x12\r\n\x05token\x18\x01 \x01(\t\x12\r\n\x05index\x18\x02 \x01(\x05\x12\x0c\n\x04\x64one\x18\x03 \x01(\x08\"A\n\x10\x43hatBatchRequest\x12-\n\x08requests\x18\x01 \x03(\x0b\x32\x1b.agentic_server.ChatRequest\"N\n\rChatBatchItem\x12\r\n\x05index\x18\x01 \x01(\x05\x12\x0e\n\x06status\x18\x02 \x01(\x05\x12\x0f\n\x07message\x18\x03 \x01(\t\x12\r\n\x05\x65rror\x18\x04 \x01(\t\"C\n\x11\x43hatBatchResponse\x12.\n\x07results\x18\x01 \x03(\x0b\x32\x1d.agentic_server.ChatBatchItem\"\x14\n\x12HealthCheckRequest\"\xa4\x01\n\x13HealthCheckResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0b\n\x03pid\x18\x02 \x01(\x05\x12\x11\n\tin_flight\x18\x03 \x01(\x05\x12\x10\n\x08\x63\x61pacity\x18\x04 \x01(\x05\x12\x13\n\x0bqueue_depth\x18\x05 \x01(\x05\x12\x16\n\x0etotal_requests\x18\x06 \x01(\x03\x12\x0e\n\x06p50_ms\x18\x07 \x01(\x01\x12\x0e\n\x06p99_ms\x18\x08 \x01(\x01\x32\xcc\x02\n\rAgenticServer\x12\x43\n\x04\x43hat\x12\x1b.agentic_server.ChatRequest\x1a\x1c.agentic_server.ChatResponse\"\x00\x12H\n\nChatStream\x12\x1b.agentic_server.ChatRequest\x1a\x19.agentic_server.ChatChunk\"\x00\x30\x01\x12R\n\tChatBatch\x12 .agentic_server.ChatBatchRequest\x1a!.agentic_server.ChatBatchResponse\"\x00\x12X\n\x0bHealthCheck\x12\".agentic_server.HealthCheckRequest\x1a#.agentic_server.HealthCheckResponse\"\x00\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -35,10 +35,18 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_CHATREQUEST']._serialized_end=94
   _globals['_CHATRESPONSE']._serialized_start=96
   _globals['_CHATRESPONSE']._serialized_end=143
-  _globals['_HEALTHCHECKREQUEST']._serialized_start=145
-  _globals['_HEALTHCHECKREQUEST']._serialized_end=165
-  _globals['_HEALTHCHECKRESPONSE']._serialized_start=167
-  _globals['_HEALTHCHECKRESPONSE']._serialized_end=204
-  _globals['_AGENTICSERVER']._serialized_start=207
-  _globals['_AGENTICSERVER']._serialized_end=381
+  _globals['_CHATCHUNK']._serialized_start=145
+  _globals['_CHATCHUNK']._serialized_end=200
+  _globals['_CHATBATCHREQUEST']._serialized_start=202
+  _globals['_CHATBATCHREQUEST']._serialized_end=267
+  _globals['_CHATBATCHITEM']._serialized_start=269
+  _globals['_CHATBATCHITEM']._serialized_end=347
+  _globals['_CHATBATCHRESPONSE']._serialized_start=349
+  _globals['_CHATBATCHRESPONSE']._serialized_end=416
+  _globals['_HEALTHCHECKREQUEST']._serialized_start=418
+  _globals['_HEALTHCHECKREQUEST']._serialized_end=438
+  _globals['_HEALTHCHECKRESPONSE']._serialized_start=441
+  _globals['_HEALTHCHECKRESPONSE']._serialized_end=605
+  _globals['_AGENTICSERVER']._serialized_start=608
+  _globals['_AGENTICSERVER']._serialized_end=940
 # @@protoc_insertion_point(module_scope)
@@ -39,6 +39,16 @@ class AgenticServerStub(object):
                 request_serializer=server__pb2.ChatRequest.SerializeToString,
                 response_deserializer=server__pb2.ChatResponse.FromString,
                 _registered_method=True)
+        self.ChatStream = channel.unary_stream(
+                '/agentic_server.AgenticServer/ChatStream',
+                request_serializer=server__pb2.ChatRequest.SerializeToString,
+                response_deserializer=server__pb2.ChatChunk.FromString,
+                _registered_method=True)
+        self.ChatBatch = channel.unary_unary(
+                '/agentic_server.AgenticServer/ChatBatch',
+                request_serializer=server__pb2.ChatBatchRequest.SerializeToString,
+                response_deserializer=server__pb2.ChatBatchResponse.FromString,
+                _registered_method=True)
         self.HealthCheck = channel.unary_unary(
                 '/agentic_server.AgenticServer/HealthCheck',
                 request_serializer=server__pb2.HealthCheckRequest.SerializeToString,
@@ -55,6 +65,18 @@ class AgenticServerServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ChatStream(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ChatBatch(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def HealthCheck(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -69,6 +91,16 @@ def add_AgenticServerServicer_to_server(servicer, server):
                     request_deserializer=server__pb2.ChatRequest.FromString,
                     response_serializer=server__pb2.ChatResponse.SerializeToString,
             ),
+            'ChatStream': grpc.unary_stream_rpc_method_handler(
+                    servicer.ChatStream,
+                    request_deserializer=server__pb2.ChatRequest.FromString,
+                    response_serializer=server__pb2.ChatChunk.SerializeToString,
+            ),
+            'ChatBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.ChatBatch,
+                    request_deserializer=server__pb2.ChatBatchRequest.FromString,
+                    response_serializer=server__pb2.ChatBatchResponse.SerializeToString,
+            ),
             'HealthCheck': grpc.unary_unary_rpc_method_handler(
                     servicer.HealthCheck,
                     request_deserializer=server__pb2.HealthCheckRequest.FromString,
@@ -112,6 +144,60 @@ class AgenticServer(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def ChatStream(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/agentic_server.AgenticServer/ChatStream',
+            server__pb2.ChatRequest.SerializeToString,
+            server__pb2.ChatChunk.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ChatBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/agentic_server.AgenticServer/ChatBatch',
+            server__pb2.ChatBatchRequest.SerializeToString,
+            server__pb2.ChatBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def HealthCheck(request,
             target,
@@ -1,2 +1,21 @@
-def call_agent(chatRequest: ChatRequest):
-    pass
\ No newline at end of file
+import asyncio
+from typing import AsyncIterator, Iterator
+from src.application.chatdatamodel import ChatRequest
+
+
+def call_agent(chatRequest: ChatRequest) -> str:
+    # your chatbot logic happens here
+    return "hello"
+
+def stream_agent(chatRequest: ChatRequest) -> Iterator[str]:
+    # yield tokens as the model produces them; the placeholder streams the full reply word by word
+    for token in call_agent(chatRequest).split(" "):
+        yield token + " "
+
+async def astream_agent(chatRequest: ChatRequest) -> AsyncIterator[str]:
+    # async variant for the grpc.aio server; the model is blocking code, so each token is pulled
+    # in a worker thread and the event loop keeps serving other chats while it waits
+    tokens = stream_agent(chatRequest)
+    done = object()
+    while (token := await asyncio.to_thread(next, tokens, done)) is not done:
+        yield token
@@ -0,0 +1,147 @@
+"""
+Local load generator for the AgenticServer.
+
+Drive a running server:
+    python -m src.tools.loadgen run --target localhost:2000 --concurrency 200 --duration 20
+
+Find the best topology for this box. Each combination starts its own server on a free port,
+gets loaded, and is stopped again:
+    python -m src.tools.loadgen sweep --processes 1,2,4 --threads 4,10,32 --max-rpcs 0,100 --server-mode sync
+"""
+import os, sys, time, socket, signal, asyncio, argparse, itertools, subprocess, grpc
+from src.pb import server_pb2, server_pb2_grpc
+
+
+def _percentile(samples: list, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+async def _call(stub, method: str, message: str):
+    request = server_pb2.ChatRequest(message=message, name="loadgen")
+    if method == "ChatStream":
+        async for _ in stub.ChatStream(request):
+            pass
+    else:
+        await stub.Chat(request)
+
+async def run_load(target: str, concurrency: int, duration: float, method: str = "Chat", channels: int = 4, message: str = "hello") -> dict:
+
+    """Keep `concurrency` calls in flight for `duration` seconds and report throughput, latency and errors"""
+
+    # several channels, so so_reuseport can spread connections over the worker processes
+    open_channels = [grpc.aio.insecure_channel(target) for _ in range(channels)]
+    stubs = [server_pb2_grpc.AgenticServerStub(channel) for channel in open_channels]
+    latencies, errors = [], {}
+    deadline = time.perf_counter() + duration
+
+    async def client(index: int):
+        stub = stubs[index % len(stubs)]
+        while time.perf_counter() < deadline:
+            start_time = time.perf_counter()
+            try:
+                await _call(stub, method, message)
+                latencies.append((time.perf_counter() - start_time) * 1000)
+            except grpc.aio.AioRpcError as e:
+                errors[e.code().name] = errors.get(e.code().name, 0) + 1
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(client(index) for index in range(concurrency)))
+    elapsed = time.perf_counter() - start_time
+    for channel in open_channels:
+        await channel.close()
+
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p99_ms": round(_percentile(latencies, 99), 2),
+        "errors": errors,
+    }
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _wait_until_ready(target: str, timeout: float = 20.0):
+    channel = grpc.insecure_channel(target)
+    stub = server_pb2_grpc.AgenticServerStub(channel)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            stub.HealthCheck(server_pb2.HealthCheckRequest(), timeout=1)
+            channel.close()
+            return
+        except grpc.RpcError:
+            time.sleep(0.2)
+    channel.close()
+    raise RuntimeError(f"Server on {target} did not become ready in {timeout}s")
+
+def sweep(args) -> list:
+    results = []
+    for processes, threads, max_rpcs in itertools.product(args.processes, args.threads, args.max_rpcs):
+        port = _free_port()
+        env = dict(
+            os.environ,
+            PORT=str(port),
+            SERVER_MODE=args.server_mode,
+            WORKER_PROCESSES=str(processes),
+            WORKER_THREADS=str(threads),
+            MAX_CONCURRENT_RPCS=str(max_rpcs),
+            METRICS_PORT="0",
+        )
+        # own process group, so stopping it also stops every forked worker
+        server = subprocess.Popen(
+            [sys.executable, "-m", "src.application.main"], env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+        )
+        try:
+            target = f"localhost:{port}"
+            _wait_until_ready(target)
+            result = asyncio.run(run_load(target, args.concurrency, args.duration, args.method, args.channels))
+        finally:
+            os.killpg(server.pid, signal.SIGKILL)
+            server.wait()
+
+        result = {"processes": processes, "threads": threads, "max_concurrent_rpcs": max_rpcs or None, **result}
+        print(result, flush=True)
+        results.append(result)
+
+    # best topology: highest throughput, then lowest tail latency
+    results.sort(key=lambda item: (-item["throughput_rps"], item["p99_ms"]))
+    print("\nBest topology:", results[0])
+    return results
+
+def _int_list(value: str) -> list:
+    return [int(item) for item in value.split(",")]
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the AgenticServer")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="load a running server")
+    run_parser.add_argument("--target", default=f"localhost:{os.getenv('PORT', '2000')}")
+
+    sweep_parser = subparsers.add_parser("sweep", help="try topologies and report the best")
+    sweep_parser.add_argument("--processes", type=_int_list, default=[1, os.cpu_count()])
+    sweep_parser.add_argument("--threads", type=_int_list, default=[4, 10, 32])
+    sweep_parser.add_argument("--max-rpcs", type=_int_list, default=[0], help="0 means unbounded")
+    sweep_parser.add_argument("--server-mode", default="sync", choices=["sync", "aio"])
+
+    for sub in (run_parser, sweep_parser):
+        sub.add_argument("--concurrency", type=int, default=100)
+        sub.add_argument("--duration", type=float, default=10.0)
+        sub.add_argument("--method", default="Chat", choices=["Chat", "ChatStream"])
+        sub.add_argument("--channels", type=int, default=4)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        print(asyncio.run(run_load(args.target, args.concurrency, args.duration, args.method, args.channels)))
+    else:
+        sweep(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+# test_chatagent.py
+"""
+Tests for the chat agent's async streaming. Run with: pytest test_chatagent.py
+"""
+
+import asyncio
+import time
+
+from src.application.chatdatamodel import ChatRequest
+from src.services import chatagent
+
+
+def test_concurrent_streams_overlap(monkeypatch):
+    def slow_agent(chatRequest):
+        time.sleep(0.5)  # a blocking model call
+        return f"hello {chatRequest.name}"
+
+    monkeypatch.setattr(chatagent, "call_agent", slow_agent)
+
+    async def collect(name):
+        return "".join([token async for token in chatagent.astream_agent(ChatRequest(name=name))])
+
+    async def chat_twice():
+        return await asyncio.gather(collect("ada"), collect("tunde"))
+
+    start = time.perf_counter()
+    replies = asyncio.run(chat_twice())
+
+    assert replies == ["hello ada ", "hello tunde "]
+    assert time.perf_counter() - start < 0.9  # one after the other would take 1s
@@ -4,6 +4,7 @@ app = FastAPI()
 
 app_state: TempAppState = app.state
 app_state.chat_memory = None # for prototyping only - don't use this in production
+app_state.memory_task = None
 
 @app.get('/health')
 async def health_check():
@@ -15,6 +16,16 @@ async def health_check():
         }
     )
 
+@app.get('/metrics')
+async def metrics():
+    return JSONResponse(
+        content={
+            "chroma": AsyncChromaUtils().stats(),
+            "models": ChatEngine.latency.summary(),
+            "rate_limits": rate_limiter.stats()
+        }
+    )
+
 @app.post("/index")
 async def process(
     chat_uid: str = Form(...),
@@ -63,7 +74,7 @@ async def generate(
         ```
         request_body: {
             query: str,
-            model: str,
+            model: str,  # a Groq model name, or "auto" to route by query complexity
             chat_uid: str,
             chatbot_name: str,
         }
@@ -74,12 +85,23 @@ async def generate(
     logger.info(f"""The user's query is: {query["query"]}""")
     
     try:
-        response = ChatEngine().generate_response(
-            query["query"], query["chat_uid"], query["model"], 
+        chat_engine = ChatEngine()
+        response = chat_engine.generate_response(
+            query["query"], query["chat_uid"], query.get("model", AUTO_MODEL), 
             chatbot_name=query["chatbot_name"], app_state=app.state
         )
+        response = await chat_engine.prime_response(response)
         return StreamingResponse(content=response)
 
+    except RateLimitExceededError as e:
+        logger.warning(str(e))
+        retry_after = str(int(e.retry_after) + 1) if e.retry_after else "60"
+        return JSONResponse(
+            content={"status": f"{str(e)} Please retry shortly."},
+            status_code=429,
+            headers={"Retry-After": retry_after}
+        )
+
     except Exception as e:
         exception = traceback.format_exc()
         logger.error(exception)
@@ -7,4 +7,25 @@ GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
 CHROMADB_HOST = os.environ.get("CHROMADB_HOST")
 CHROMADB_PORT = int(os.environ.get("CHROMADB_PORT", "8005"))
 CHROMADB_SSL = os.environ.get("CHROMADB_SSL", "false").lower() in ("1", "true", "yes") # returns False if there's no CHROMADB_SSL in .env or if CHROMADB_SSL==""
-CHROMA_USE_SERVER = os.environ.get("CHROMA_USE_SERVER", "false").lower() in ("1", "true", "yes")
\ No newline at end of file
+CHROMA_USE_SERVER = os.environ.get("CHROMA_USE_SERVER", "false").lower() in ("1", "true", "yes")
+# chroma data-access tuning
+CHROMA_MAX_WORKERS = int(os.environ.get("CHROMA_MAX_WORKERS", "8"))                 # bounded thread pool for chroma calls
+CHROMA_MAX_CONNECTIONS = int(os.environ.get("CHROMA_MAX_CONNECTIONS", "16"))        # http connection pool size (server mode)
+CHROMA_KEEPALIVE_SECS = float(os.environ.get("CHROMA_KEEPALIVE_SECS", "60"))        # keep idle http connections open for reuse
+CHROMA_UPSERT_BATCH_SIZE = int(os.environ.get("CHROMA_UPSERT_BATCH_SIZE", "256"))
+CHROMA_UPSERT_CONCURRENCY = int(os.environ.get("CHROMA_UPSERT_CONCURRENCY", "4"))  # max upsert batches in flight
+
+# chat memory
+CHAT_MEMORY_MODE = os.environ.get("CHAT_MEMORY_MODE", "buffer").lower()                  # "buffer" or "summary"
+CHAT_MEMORY_RECENT_TOKENS = int(os.environ.get("CHAT_MEMORY_RECENT_TOKENS", "2048"))     # recent turns kept verbatim in summary mode
+CHAT_MEMORY_SUMMARY_TOKENS = int(os.environ.get("CHAT_MEMORY_SUMMARY_TOKENS", "512"))    # upper bound for the rolling summary
+CHAT_MEMORY_SUMMARY_MODEL = os.environ.get("CHAT_MEMORY_SUMMARY_MODEL", "llama-3.1-8b-instant")
+
+# llm clients
+GROQ_MAX_CONNECTIONS = int(os.environ.get("GROQ_MAX_CONNECTIONS", "32"))  # shared http connection pool for all groq clients
+
+# model routing (used when a chat request asks for model "auto")
+ROUTING_SHORT_QUERY_TOKENS = int(os.environ.get("ROUTING_SHORT_QUERY_TOKENS", "32"))      # queries up to this size may go to the fast tier
+ROUTING_CONFIDENT_SCORE = float(os.environ.get("ROUTING_CONFIDENT_SCORE", "0.75"))        # top retrieval score that marks a direct lookup
+ROUTING_SHALLOW_HISTORY = int(os.environ.get("ROUTING_SHALLOW_HISTORY", "4"))             # max history messages for the fast tier
+ROUTING_LONG_CONTEXT_TOKENS = int(os.environ.get("ROUTING_LONG_CONTEXT_TOKENS", "6000"))  # prompts above this go to the long-context tier
@@ -15,3 +15,8 @@ class ChromaConnectionError(Exception):
 
 class ChromaCollectionError(Exception):
     pass
+
+class RateLimitExceededError(Exception):
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
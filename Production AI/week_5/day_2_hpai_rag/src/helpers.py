@@ -1,10 +1,15 @@
-import tempfile, groq, time, traceback
+import tempfile, groq, time, traceback, asyncio, threading
 from src.models import *
 from src.prompts import *
 from src.config import *
 from src.loghandler import *
 from src.exceptions import *
+from src.metrics import *
+from src.ratelimit import parse_duration
+from src.routing import *
 from pathlib import Path
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Any
 from fastapi import FastAPI, Request, UploadFile, Form, Depends
 from fastapi.responses import PlainTextResponse, StreamingResponse, JSONResponse
@@ -19,21 +24,36 @@ from llama_index.core import (
     # StorageContext
 )
 from llama_index.core.memory.chat_memory_buffer import ChatMemoryBuffer
+from llama_index.core.llms import ChatMessage, MessageRole
+from llama_index.core.utils import get_tokenizer
 from llama_index.vector_stores.chroma import ChromaVectorStore
 from llama_index.embeddings.huggingface import HuggingFaceEmbedding
 import chromadb
+from chromadb.config import Settings as ChromaSettings
 
 
 API_DIR = Path(__file__).resolve().parent / "../"
 LOG_FILENAME = str(API_DIR / "./logs/status_logs.log")
 DEFAULT_TEMPERATURE = 0.1
+EXPECTED_OUTPUT_TOKENS = 1024 # added to prompt tokens when reserving rate-limit budget
 
 logger = set_logger(
     to_file=True, log_file_name=LOG_FILENAME, to_console=True, custom_formatter=ColorFormmater
 )
 
+model_router = ModelRouter(
+    ROUTING_TIERS,
+    token_budgets={model: tokens for model, (_, tokens) in MODEL_RATE_LIMITS.items()},
+    log_file=str(API_DIR / "./logs/routing_decisions.jsonl"),
+    short_query_tokens=ROUTING_SHORT_QUERY_TOKENS,
+    confident_score=ROUTING_CONFIDENT_SCORE,
+    shallow_history=ROUTING_SHALLOW_HISTORY,
+    long_context_tokens=ROUTING_LONG_CONTEXT_TOKENS
+)
+
 class TempAppState:
     chat_memory: ChatMemoryBuffer
+    memory_task: asyncio.Task
 
 class FileUtils:
 
@@ -128,7 +148,8 @@ class EmbeddingUtils:
     ):
 
         collection_name = f"aisoc-{chat_uid}-embeddings"
-        chroma_collection = ChromaUtils().init_chroma(collection_name, task="create")
+        chroma_store = AsyncChromaUtils()
+        chroma_collection = await chroma_store.get_collection(collection_name, task="create")
 
         try:
             logger.info(f"Generating vector embeddings for collection: {collection_name}...")
@@ -163,7 +184,8 @@ class EmbeddingUtils:
 
         # populate chroma collection with embeddings
         logger.info(f"Populating collection {collection_name} with computed embeddings...")
-        chroma_collection.upsert(
+        await chroma_store.upsert(
+            chroma_collection,
             ids=id_list,
             documents=content_list,
             metadatas=metadata_list,
@@ -171,7 +193,7 @@ class EmbeddingUtils:
         )
 
         # inspect collection
-        collection_count = chroma_collection.count()
+        collection_count = await chroma_store.count(chroma_collection)
         if collection_count == 0:
             message = f"Could not store embeddings in Chroma database. Collection is empty!"
             logger.error(message)
@@ -182,9 +204,10 @@ class EmbeddingUtils:
     async def retrieve_embeddings(self, chat_uid: str):
 
         collection_name = f"aisoc-{chat_uid}-embeddings"
-        chroma_collection = ChromaUtils().init_chroma(collection_name)
+        chroma_store = AsyncChromaUtils()
+        chroma_collection = await chroma_store.get_collection(collection_name)
 
-        collection_count = chroma_collection.count()
+        collection_count = await chroma_store.count(chroma_collection)
         if collection_count == 0:
             message = f"Could not find embeddings in ChromaDB for conversation {chat_uid}. Please pass the correct chat_uid."
             logger.error(message)
@@ -201,6 +224,10 @@ class EmbeddingUtils:
 
 class ChromaUtils:
 
+    # one client per process and mode, so http connections are kept alive and reused across requests
+    _clients: dict = {}
+    _clients_lock = threading.Lock()
+
     def get_chroma_client(self, use_server: bool = True):
         
         """
@@ -208,16 +235,28 @@ class ChromaUtils:
         If you do not want to use an external server, set CHROMA_USE_SERVER=false; this will use ChromaDB persistent client mode
         """
 
+        with self._clients_lock:
+            if use_server not in self._clients:
+                self._clients[use_server] = self.create_chroma_client(use_server)
+            return self._clients[use_server]
+
+    def create_chroma_client(self, use_server: bool = True):
+
         if use_server:
             logger.info(f"Using Chroma Server >> Host: {CHROMADB_HOST}, Port: {CHROMADB_PORT}")
+            settings = ChromaSettings(
+                chroma_http_keepalive_secs=CHROMA_KEEPALIVE_SECS,
+                chroma_http_max_connections=CHROMA_MAX_CONNECTIONS,
+                chroma_http_max_keepalive_connections=CHROMA_MAX_CONNECTIONS
+            )
             # Only use server mode if explicitly requested
             if CHROMADB_SSL:
                 chroma_client = chromadb.HttpClient(
-                    host=CHROMADB_HOST, port=CHROMADB_PORT, ssl=True
+                    host=CHROMADB_HOST, port=CHROMADB_PORT, ssl=True, settings=settings
                 )
             else:
                 chroma_client = chromadb.HttpClient(
-                    host=CHROMADB_HOST, port=CHROMADB_PORT
+                    host=CHROMADB_HOST, port=CHROMADB_PORT, settings=settings
                 )
         else:
             # Embedded, on-disk Chroma (recommended for local dev)
@@ -249,13 +288,117 @@ class ChromaUtils:
         logger.info(f"Collection {task}d: {collection_name}")
         return collection
 
+class AsyncChromaUtils:
+
+    """
+    Async access to Chroma for the API endpoints. The chroma client is blocking, so every call runs
+    on a bounded thread pool over the shared client from `ChromaUtils` instead of on the event loop.
+    """
+
+    executor = ThreadPoolExecutor(max_workers=CHROMA_MAX_WORKERS, thread_name_prefix="chroma")
+    latency = LatencyTracker()
+
+    async def run(self, operation: str, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        with self.latency.track(operation):
+            return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    async def get_collection(self, collection_name: str, task: str = "retrieve"):
+        return await self.run("get_collection", ChromaUtils().init_chroma, collection_name, task)
+
+    async def count(self, collection) -> int:
+        return await self.run("count", collection.count)
+
+    async def upsert(
+        self,
+        collection,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[dict],
+        embeddings: List[List[float]],
+        batch_size: int = CHROMA_UPSERT_BATCH_SIZE,
+        concurrency: int = CHROMA_UPSERT_CONCURRENCY
+    ):
+        # issue batches concurrently, but never more than `concurrency` in flight
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def upsert_batch(start: int):
+            end = start + batch_size
+            async with semaphore:
+                await self.run(
+                    "upsert",
+                    collection.upsert,
+                    ids=ids[start:end],
+                    documents=documents[start:end],
+                    metadatas=metadatas[start:end],
+                    embeddings=embeddings[start:end]
+                )
+
+        await asyncio.gather(*(upsert_batch(start) for start in range(0, len(ids), batch_size)))
+
+    async def query(self, collection, query_embeddings: List[List[float]], n_results: int = 5, **kwargs):
+        return await self.run(
+            "query", collection.query, query_embeddings=query_embeddings, n_results=n_results, **kwargs
+        )
+
+    def stats(self) -> dict:
+        return self.latency.summary()
+
+class PromptAssembler:
+
+    """
+    Assembles chat prompts with the stable parts first: system prompt, then chat history, then the per-turn
+    retrieved context and query. Providers cache prompts by exact prefix, so keeping the volatile segments
+    last lets consecutive turns for the same chatbot reuse the cached prefix.
+    """
+
+    # rendered system prompts keyed by (template, chatbot_name)
+    _system_prompts: dict = {}
+    _lock = threading.Lock()
+    tokenizer = get_tokenizer()
+
+    def render_system_prompt(self, template: str, chatbot_name: str = "") -> str:
+        key = (template, chatbot_name)
+        with self._lock:
+            if key not in self._system_prompts:
+                chatbot_desc = f"Your name is {chatbot_name}. " if chatbot_name else ""
+                self._system_prompts[key] = template.format(chatbot_desc=chatbot_desc)
+                logger.info(f"System prompt::{self._system_prompts[key]}")
+            return self._system_prompts[key]
+
+    def build_messages(
+        self,
+        system_prompt: str,
+        history: List[ChatMessage],
+        context_str: str,
+        query: str
+    ) -> List[ChatMessage]:
+        return [
+            ChatMessage(role=MessageRole.SYSTEM, content=system_prompt),
+            *history,
+            ChatMessage(role=MessageRole.USER, content=CONTEXT_PROMPT.format(context_str=context_str, query=query))
+        ]
+
+    def count_tokens(self, system_prompt: str, history: List[ChatMessage], context_str: str, query: str) -> dict:
+        counts = {
+            "system": len(self.tokenizer(system_prompt)),
+            "history": sum(len(self.tokenizer(str(message.content or ""))) for message in history),
+            "context": len(self.tokenizer(context_str)),
+            "query": len(self.tokenizer(query)),
+        }
+        counts["total"] = sum(counts.values())
+        return counts
+
 class ChatEngine:
+
+    # end-to-end response latency per served model
+    latency = LatencyTracker()
     
     async def generate_response(
         self,
         query: str,
         chat_uid: str,
-        model: str = LLAMA_3_3_70B,
+        model: str = AUTO_MODEL,
         system_prompt: str = DEFAULT_SYSTEM_PROMPT,
         chatbot_name: str = "",
         chat_mode: str = "context",
@@ -263,12 +406,10 @@ class ChatEngine:
         streaming: bool = True,
         app_state: TempAppState = None
     ):
-        chatbot_desc = f"Your name is {chatbot_name}. " if chatbot_name else ""
-        system_prompt = system_prompt.format(chatbot_desc=chatbot_desc)
-        logger.info(f"System prompt::{system_prompt}")
+        prompt_assembler = PromptAssembler()
+        system_prompt = prompt_assembler.render_system_prompt(system_prompt, chatbot_name)
 
         index, index_size = await EmbeddingUtils().retrieve_embeddings(chat_uid)
-        Settings.llm = LLMClient().map_task_to_client(task="rag", model=model)
         # Settings.embed_model = HuggingFaceEmbedding()
 
         # heuristic for choice_k; experiment until you achieve optimal rule
@@ -278,35 +419,253 @@ class ChatEngine:
                 else index_size//10 if index_size < 200 \
                     else 30
         
+        # let the previous turn's summarization land before its memory is read again
+        await self.wait_for_memory_task(app_state)
         app_state.chat_memory = self.retrieve_chat_memory(choice_k=choice_k, app_state=app_state)
 
-        chat_engine = index.as_chat_engine(
-            # llm=llm_client,
-            chat_mode=chat_mode,
-            system_prompt=system_prompt,
-            similarity_top_k=choice_k,
-            verbose=verbose,
-            streaming=streaming,
-            memory=app_state.chat_memory
-        )
+        if chat_mode != "context":
+            # other llama-index chat modes assemble their own prompts
+            if model == AUTO_MODEL:
+                model = model_router.tiers["standard"]
+            model = await rate_limiter.acquire(model, EXPECTED_OUTPUT_TOKENS*choice_k)
+            # pooled per model and passed explicitly; the global Settings.llm would race between concurrent requests
+            llm = LLMClient().map_task_to_client(task="rag", model=model)
+            chat_engine = index.as_chat_engine(
+                llm=llm,
+                chat_mode=chat_mode,
+                system_prompt=system_prompt,
+                similarity_top_k=choice_k,
+                verbose=verbose,
+                streaming=streaming,
+                memory=app_state.chat_memory
+            )
+            response = chat_engine.stream_chat(query)
+            async for token in self.relay_tokens(response.response_gen, verbose=verbose, streaming=streaming):
+                yield token
+            self.schedule_memory_summary(app_state)
+            return
+
+        retriever = index.as_retriever(similarity_top_k=choice_k)
+        nodes = await retriever.aretrieve(query)
+        context_str = "\n\n".join(node.get_content() for node in nodes)
+
+        history = app_state.chat_memory.get()
+        messages = prompt_assembler.build_messages(system_prompt, history, context_str, query)
+        prompt_tokens = prompt_assembler.count_tokens(system_prompt, history, context_str, query)
+        logger.info(f"Prompt tokens::{prompt_tokens}")
+
+        estimated_tokens = prompt_tokens["total"] + EXPECTED_OUTPUT_TOKENS
+        decision = None
+        if model == AUTO_MODEL:
+            decision = model_router.route(
+                query,
+                query_tokens=prompt_tokens["query"],
+                estimated_tokens=estimated_tokens,
+                scores=[node.score for node in nodes],
+                history_messages=len(history)
+            )
+            model = decision["model"]
+            logger.info(f"Routing::{decision}")
+
+        # rate limits are handled here, before the first token; nothing after this point retries
+        start_time = time.perf_counter()
+        served_by, first_chunk, response = await self.start_stream(model, messages, estimated_tokens)
+        time_to_first_token = time.perf_counter() - start_time
+
+        answer = ""
+        tokens = (chunk.delta or "" async for chunk in self.chain_chunks(first_chunk, response))
+        async for token in self.relay_tokens(tokens, verbose=verbose, streaming=streaming):
+            answer += token
+            yield token
+
+        total_time = time.perf_counter() - start_time
+        self.latency.record(served_by, total_time)
+        if decision:
+            model_router.record(decision, served_by, time_to_first_token, total_time, len(answer))
+
+        # history keeps the bare query, not the retrieved context, so it stays small and prefix-stable
+        app_state.chat_memory.put(ChatMessage(role=MessageRole.USER, content=query))
+        app_state.chat_memory.put(ChatMessage(role=MessageRole.ASSISTANT, content=answer))
+
+        self.schedule_memory_summary(app_state)
+
+    async def start_stream(self, model: str, messages: List[ChatMessage], estimated_tokens: int, priority: str = "interactive"):
+
+        """
+        Admit the call through the rate limiter and pull the first chunk of the response. A 429 at this point
+        blocks the model and retries on the next one in its fallback chain, so a rate limit never cuts off a
+        stream the user has already started reading.
+        """
+
+        for _ in range(len(rate_limiter.candidates(model))):
+            admitted_model = await rate_limiter.acquire(model, estimated_tokens, priority)
+            if admitted_model != model:
+                logger.warning(f"Rate limit budget exhausted for {model}. Failing over to {admitted_model}...")
+
+            llm = LLMClient().map_task_to_client(task="rag", model=admitted_model)
+            try:
+                response = await llm.astream_chat(messages)
+                return admitted_model, await response.__anext__(), response
+            except StopAsyncIteration:
+                return admitted_model, None, response
+            except Exception as e:
+                if getattr(e, "status_code", None) != 429:
+                    raise
+                retry_after = getattr(getattr(e, "response", None), "headers", {}).get("retry-after")
+                rate_limiter.penalize(admitted_model, parse_duration(retry_after) if retry_after else None)
+                logger.warning(f"Rate limited by Groq on {admitted_model} before streaming. Retrying...")
+
+        raise RateLimitExceededError(f"Rate limited on {model} and its fallback models.")
+
+    @staticmethod
+    async def relay_tokens(tokens, verbose: bool = True, streaming: bool = True):
+
+        """
+        Pass model tokens (a sync or async iterator) through to the client. Errors while streaming become a
+        ChatEngineError with the traceback in the logs. With streaming off, the answer is yielded once, when
+        complete; with verbose on, the full answer is logged at the end.
+        """
 
-        response = chat_engine.stream_chat(query)
         logger.info("Starting response stream...\n")
+        answer = ""
         try:
-            for token in response.response_gen:
-                print(token, end="")
-                yield str(token)
-        except:
+            if hasattr(tokens, "__aiter__"):
+                async for token in tokens:
+                    token = str(token)
+                    answer += token
+                    if streaming:
+                        yield token
+            else:
+                for token in tokens:
+                    token = str(token)
+                    answer += token
+                    if streaming:
+                        yield token
+        except Exception:
             message = f"An error occured while generating chat response."
             exception = traceback.format_exc()
             logger.error(f"{message}: {exception}")
             raise ChatEngineError(f"{message}. See the system logs for more information.")
 
+        if not streaming:
+            yield answer
+        if verbose:
+            logger.info(f"Chat response::{answer}")
+
+    @staticmethod
+    async def chain_chunks(first_chunk, response):
+        if first_chunk is not None:
+            yield first_chunk
+        async for chunk in response:
+            yield chunk
+
+    @staticmethod
+    async def prime_response(response):
+
+        """
+        Run a response generator up to its first token, so errors raised before streaming starts
+        (retrieval, rate limits) can still be returned as a proper error response.
+        """
+
+        try:
+            first_token = await response.__anext__()
+        except StopAsyncIteration:
+            first_token = ""
+
+        async def stream():
+            yield first_token
+            async for token in response:
+                yield token
+
+        return stream()
+
+    def schedule_memory_summary(self, app_state: TempAppState):
+        # compress older turns off the request path, once the user already has the full answer
+        if CHAT_MEMORY_MODE == "summary":
+            app_state.memory_task = asyncio.create_task(self.summarize_chat_memory(app_state.chat_memory))
+
     # Methods for managing chat history within an API session - not ideal for production
     def init_chat_memory(self, choice_k):
-        token_limit = choice_k*1024
+        if CHAT_MEMORY_MODE == "summary":
+            # rolling summary plus a bounded window of recent turns; see summarize_chat_memory()
+            token_limit = CHAT_MEMORY_RECENT_TOKENS + CHAT_MEMORY_SUMMARY_TOKENS
+        else:
+            token_limit = choice_k*1024
         return ChatMemoryBuffer.from_defaults(token_limit=token_limit)
 
+    async def wait_for_memory_task(self, app_state: TempAppState, timeout: float = 10.0):
+        task = getattr(app_state, "memory_task", None)
+        if task is None or task.done():
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(task), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Chat memory summarization is still running. Using the current memory...")
+
+    async def summarize_chat_memory(self, memory: ChatMemoryBuffer, model: str = CHAT_MEMORY_SUMMARY_MODEL):
+
+        """
+        Fold turns that fall outside the recent-token window into a rolling summary, stored as the first
+        message of the memory, so each prompt carries a bounded history no matter how long the chat runs.
+        """
+
+        try:
+            # copy: the buffer's list keeps growing if new turns arrive while the summary is generated
+            snapshot = list(memory.get_all())
+            messages = snapshot
+            summary = None
+            if messages and messages[0].additional_kwargs.get("is_summary"):
+                summary, messages = messages[0], messages[1:]
+
+            # keep the most recent turns that fit the budget verbatim
+            recent, recent_tokens = [], 0
+            for message in reversed(messages):
+                message_tokens = len(memory.tokenizer_fn(str(message.content or "")))
+                if recent_tokens + message_tokens > CHAT_MEMORY_RECENT_TOKENS:
+                    break
+                recent.insert(0, message)
+                recent_tokens += message_tokens
+
+            older = messages[:len(messages) - len(recent)]
+            # never start the recent window with an orphaned assistant reply
+            while recent and recent[0].role != MessageRole.USER:
+                older.append(recent.pop(0))
+
+            if not older:
+                return
+
+            start_time = time.time()
+            transcript = "\n".join(f"{message.role.value}: {message.content}" for message in older)
+            prompt = CHAT_SUMMARY_PROMPT.format(
+                summary=summary.content if summary else "None",
+                transcript=transcript,
+                max_words=int(CHAT_MEMORY_SUMMARY_TOKENS*0.75)
+            )
+            model = await rate_limiter.acquire(model, len(memory.tokenizer_fn(prompt)) + CHAT_MEMORY_SUMMARY_TOKENS, "background")
+            llm = LLMClient().map_task_to_client(task="rag", model=model)
+            response = await llm.acomplete(prompt)
+
+            summary_message = ChatMessage(
+                role=MessageRole.SYSTEM,
+                content=f"Summary of the earlier conversation: {response.text.strip()}",
+                additional_kwargs={"is_summary": True}
+            )
+            # turns added after the snapshot (e.g. when the next request stopped waiting for this task)
+            # are kept; if the memory was replaced meanwhile, the stale summary is dropped instead
+            current = memory.get_all()
+            if len(current) < len(snapshot) or any(new is not old for new, old in zip(current, snapshot)):
+                logger.warning("Chat memory changed while it was being summarized. Discarding the summary...")
+                return
+            memory.set([summary_message] + recent + current[len(snapshot):])
+            logger.info(
+                f"Summarized {len(older)} chat message(s) in {time.time()-start_time:.2f} seconds; "
+                f"{len(recent)} recent message(s) kept verbatim."
+            )
+
+        except Exception:
+            exception = traceback.format_exc()
+            logger.warning(f"Could not summarize chat memory. Keeping the full buffer: {exception}")
+
     def retrieve_chat_memory(self, choice_k, app_state:TempAppState=None):
         try:
             logger.info("Retrieving chat memory...")
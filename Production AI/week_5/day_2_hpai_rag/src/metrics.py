@@ -0,0 +1,49 @@
+import time, threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+
+class LatencyTracker:
+
+    """Keeps a rolling window of latency samples per operation and reports p50/p99"""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, seconds: float):
+        with self._lock:
+            self._samples[operation].append(seconds)
+            self._counts[operation] += 1
+
+    @contextmanager
+    def track(self, operation: str):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(operation, time.perf_counter() - start_time)
+
+    @staticmethod
+    def percentile(samples: list, pct: float) -> float:
+        if not samples:
+            return 0.0
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def summary(self) -> dict:
+        with self._lock:
+            snapshot = {op: list(samples) for op, samples in self._samples.items()}
+            counts = dict(self._counts)
+
+        return {
+            op: {
+                "count": counts[op],
+                "p50_ms": round(self.percentile(samples, 50) * 1000, 2),
+                "p99_ms": round(self.percentile(samples, 99) * 1000, 2),
+            }
+            for op, samples in snapshot.items()
+        }
@@ -1,9 +1,11 @@
-import groq
+import groq, httpx, threading
 from llama_index.llms.groq import Groq
 from typing import Literal
 from src.config import (
-    GROQ_API_KEY
+    GROQ_API_KEY,
+    GROQ_MAX_CONNECTIONS
 )
+from src.ratelimit import RateLimitScheduler
 
 # models via groq
 GPT_OSS_20B = "openai/gpt-oss-20b"                              # 8k token context window
@@ -15,6 +17,36 @@ KIMI_K2 = "moonshotai/kimi-k2-instruct"                         # 10k
 QWEN_3_32B = "qwen/qwen3-32b"                                   # 6k
 DEFAULT_EMBED_MODEL = "BAAI/bge-small-en" 
 
+# groq free-tier budgets: (requests/min, tokens/min); token budgets are corrected from response headers
+MODEL_RATE_LIMITS = {
+    GPT_OSS_20B: (30, 8000),
+    GPT_OSS_120B: (30, 8000),
+    LLAMA_3_1_8B: (30, 6000),
+    LLAMA_3_3_70B: (30, 12000),
+    LLAMA_4_SCOUT_17B: (30, 30000),
+    KIMI_K2: (60, 10000),
+    QWEN_3_32B: (60, 6000),
+}
+
+# cheaper models to fail over to, in order, when a model's budget is exhausted
+FALLBACK_MODELS = {
+    GPT_OSS_120B: [GPT_OSS_20B, LLAMA_3_1_8B],
+    GPT_OSS_20B: [LLAMA_3_1_8B],
+    LLAMA_3_3_70B: [LLAMA_4_SCOUT_17B, LLAMA_3_1_8B],
+    LLAMA_4_SCOUT_17B: [LLAMA_3_1_8B],
+    KIMI_K2: [LLAMA_3_3_70B, LLAMA_3_1_8B],
+    QWEN_3_32B: [LLAMA_3_1_8B],
+}
+
+rate_limiter = RateLimitScheduler(MODEL_RATE_LIMITS, FALLBACK_MODELS)
+
+# models picked by the router for `model="auto"`, fastest first
+ROUTING_TIERS = {
+    "fast": LLAMA_3_1_8B,
+    "standard": LLAMA_3_3_70B,
+    "long_context": LLAMA_4_SCOUT_17B,
+}
+
 
 # TODO: add more clients - Vertex, ANthropic, etc
 #       add a method to map model names to these clients
@@ -23,20 +55,47 @@ class LLMClient:
 
     task: Literal["base", "rag"] = "rag"
 
-    def get_groq(self):
-        return groq.Groq(api_key=GROQ_API_KEY)
+    # clients are built once per (provider, model, temperature) and reused by every request in the process
+    _pool: dict = {}
+    _lock = threading.Lock()
+
+    # all clients share these, so every model reuses the same keep-alive connections to the Groq API
+    _http_limits = httpx.Limits(max_connections=GROQ_MAX_CONNECTIONS, max_keepalive_connections=GROQ_MAX_CONNECTIONS)
+    # every response feeds its rate-limit headers back into the scheduler
+    http_client = httpx.Client(
+        limits=_http_limits, timeout=60.0,
+        event_hooks={"response": [rate_limiter.observe_response]}
+    )
+    async_http_client = httpx.AsyncClient(
+        limits=_http_limits, timeout=60.0,
+        event_hooks={"response": [rate_limiter.aobserve_response]}
+    )
+
+    def get_groq(self, model: str = None, temperature: float = None):
+        # the raw groq client takes the model per call, so one instance serves every model
+        return groq.Groq(api_key=GROQ_API_KEY, http_client=self.http_client)
 
-    def get_groq_from_llama_index(self, model:str):
-        return Groq(model, GROQ_API_KEY)
+    def get_groq_from_llama_index(self, model: str, temperature: float = 0.1):
+        return Groq(
+            model,
+            GROQ_API_KEY,
+            temperature=temperature,
+            http_client=self.http_client,
+            async_http_client=self.async_http_client
+        )
     
-    def map_task_to_client(self, task:str, model:str):
+    def map_task_to_client(self, task:str, model:str, temperature: float = 0.1):
         
         task_map = {
-            "base": self.get_groq,
-            "rag": self.get_groq_from_llama_index
+            "base": ("groq", self.get_groq),
+            "rag": ("llama_index.groq", self.get_groq_from_llama_index)
         }
 
-        client = task_map.get(task)
+        provider, client = task_map.get(task)
+        key = (provider, None, None) if task == "base" else (provider, model, temperature)
 
-        return client(model)
+        with self._lock:
+            if key not in self._pool:
+                self._pool[key] = client(model, temperature)
+            return self._pool[key]
     
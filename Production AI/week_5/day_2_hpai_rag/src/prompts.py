@@ -1,3 +1,22 @@
 DEFAULT_SYSTEM_PROMPT = """{chatbot_desc}You are a helpful and honest assistant designed for a RAG-powered application. \
 Your goal is to use the provided information below to answer my request. These information has been extracted from \
-a set of documents, which could include unstructure PDFs, webpages, databases, etc."""
\ No newline at end of file
+a set of documents, which could include unstructure PDFs, webpages, databases, etc."""
+
+CHAT_SUMMARY_PROMPT = """Progressively summarize the conversation below between a user and an assistant, adding onto \
+the previous summary. Keep names, facts, figures, decisions and open questions the user may refer back to. \
+Return only the new summary, in at most {max_words} words.
+
+Previous summary:
+{summary}
+
+New lines of conversation:
+{transcript}
+
+New summary:"""
+
+
+CONTEXT_PROMPT = """Context information from the documents is below.
+---------------------
+{context_str}
+---------------------
+Using the context above and our conversation so far, respond to: {query}"""
@@ -0,0 +1,185 @@
+import asyncio, json, re, time, threading
+from src.exceptions import RateLimitExceededError
+
+
+# how long each priority class may queue for budget, and how much of a model's budget it must leave for others
+PRIORITY_CLASSES = {
+    "interactive": {"max_wait": 5.0, "reserve": 0.0},
+    "background": {"max_wait": 30.0, "reserve": 0.25},
+}
+
+
+def parse_duration(value: str) -> float:
+    """Parse Groq reset headers such as `7.66s`, `2m59.56s` or `120ms` into seconds"""
+
+    if not value:
+        return 0.0
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    units = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+    return sum(float(amount) * units[unit] for amount, unit in re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value))
+
+
+class TokenBucket:
+
+    """Refills `capacity` units evenly over `period` seconds"""
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.period = period
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, reserve: float = 0.0) -> float:
+        self.refill()
+        # cap at capacity: a large low-priority request still gets in once the bucket is full
+        needed = min(amount + reserve * self.capacity, self.capacity)
+        return 0.0 if self.tokens >= needed else (needed - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        self.refill()
+        self.tokens -= amount
+
+    def sync(self, limit: float = None, remaining: float = None):
+        if limit:
+            self.capacity = limit
+            self.rate = limit / self.period
+        if remaining is not None:
+            # the server count is authoritative, but never give back budget we already spent locally
+            self.refill()
+            self.tokens = min(self.tokens, remaining)
+
+
+class ModelBudget:
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.blocked_until = 0.0
+
+    def wait_time(self, estimated_tokens: int, reserve: float = 0.0) -> float:
+        blocked = max(0.0, self.blocked_until - time.monotonic())
+        return max(blocked, self.requests.wait_time(1, reserve), self.tokens.wait_time(estimated_tokens, reserve))
+
+    def consume(self, estimated_tokens: int):
+        self.requests.consume(1)
+        self.tokens.consume(estimated_tokens)
+
+
+class RateLimitScheduler:
+
+    """
+    Client-side admission control for Groq. Each model has request and token buckets that start from the
+    configured per-minute limits and are corrected from the `x-ratelimit-*` response headers. A request
+    waits for budget up to its priority's limit, then fails over along the model's fallback chain, and is
+    shed with `RateLimitExceededError` only when no model in the chain can take it.
+    """
+
+    def __init__(self, rate_limits: dict, fallback_models: dict, default_limits: tuple = (30, 6000)):
+        self.rate_limits = rate_limits
+        self.fallback_models = fallback_models
+        self.default_limits = default_limits
+        self._budgets = {}
+        self._lock = threading.RLock()
+
+    def budget(self, model: str) -> ModelBudget:
+        with self._lock:
+            if model not in self._budgets:
+                self._budgets[model] = ModelBudget(*self.rate_limits.get(model, self.default_limits))
+            return self._budgets[model]
+
+    def candidates(self, model: str) -> list:
+        return [model, *self.fallback_models.get(model, [])]
+
+    async def acquire(self, model: str, estimated_tokens: int, priority: str = "interactive") -> str:
+
+        """Reserve budget for one call and return the model to send it to"""
+
+        policy = PRIORITY_CLASSES[priority]
+        shortest_wait = None
+
+        for candidate in self.candidates(model):
+            budget = self.budget(candidate)
+            deadline = time.monotonic() + policy["max_wait"]
+
+            with self._lock:
+                wait = budget.wait_time(estimated_tokens, policy["reserve"])
+            while 0 < wait <= deadline - time.monotonic():
+                await asyncio.sleep(wait)
+                with self._lock:
+                    wait = budget.wait_time(estimated_tokens, policy["reserve"])
+
+            with self._lock:
+                # re-check and consume together so concurrent waiters cannot both take the last budget
+                wait = budget.wait_time(estimated_tokens, policy["reserve"])
+                if wait == 0:
+                    budget.consume(estimated_tokens)
+                    return candidate
+
+            shortest_wait = wait if shortest_wait is None else min(shortest_wait, wait)
+
+        raise RateLimitExceededError(
+            f"Rate limit budget exhausted for {model} and its fallback models.", retry_after=shortest_wait
+        )
+
+    def penalize(self, model: str, retry_after: float = None):
+        """Block a model after the server rejected a call with 429"""
+        with self._lock:
+            budget = self.budget(model)
+            budget.blocked_until = max(budget.blocked_until, time.monotonic() + (retry_after or budget.requests.period))
+
+    def update_from_headers(self, model: str, headers):
+        with self._lock:
+            budget = self.budget(model)
+
+            # groq reports tokens per minute here; the request headers count requests per day
+            limit_tokens = headers.get("x-ratelimit-limit-tokens")
+            remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+            budget.tokens.sync(
+                limit=float(limit_tokens) if limit_tokens else None,
+                remaining=float(remaining_tokens) if remaining_tokens else None
+            )
+
+            remaining_requests = headers.get("x-ratelimit-remaining-requests")
+            if remaining_requests is not None and float(remaining_requests) <= 0:
+                reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+                budget.blocked_until = max(budget.blocked_until, time.monotonic() + reset)
+
+        if headers.get("retry-after"):
+            self.penalize(model, parse_duration(headers.get("retry-after")))
+
+    def observe_response(self, response):
+        """httpx response hook; reads the model from the request body and records its rate-limit headers"""
+        try:
+            model = json.loads(response.request.content or b"{}").get("model")
+        except (ValueError, AttributeError):
+            return
+        if model:
+            self.update_from_headers(model, response.headers)
+
+    async def aobserve_response(self, response):
+        self.observe_response(response)
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            for budget in self._budgets.values():
+                budget.requests.refill()
+                budget.tokens.refill()
+            return {
+                model: {
+                    "requests_available": round(budget.requests.tokens, 1),
+                    "tokens_available": round(budget.tokens.tokens),
+                    "blocked_for_secs": round(max(0.0, budget.blocked_until - now), 1),
+                }
+                for model, budget in self._budgets.items()
+            }
@@ -0,0 +1,95 @@
+import json, threading, time
+from pathlib import Path
+
+
+AUTO_MODEL = "auto"
+
+# words that usually mean the answer has to be synthesized across several chunks rather than looked up
+SYNTHESIS_HINTS = (
+    "compare", "contrast", "summar", "explain why", "analy", "evaluate", "pros and cons",
+    "step by step", "in detail", "overview", "relationship", "implication", "difference"
+)
+
+
+class ModelRouter:
+
+    """
+    Picks the fastest model that can handle a query, from cheap features: query length, retrieval scores,
+    conversation depth and prompt size. Every decision is appended to a JSONL log together with the latency
+    observed for it, so the thresholds can be tuned from real traffic.
+    """
+
+    def __init__(
+        self,
+        tiers: dict,
+        token_budgets: dict,
+        log_file: str = None,
+        short_query_tokens: int = 32,
+        confident_score: float = 0.75,
+        shallow_history: int = 4,
+        long_context_tokens: int = 6000
+    ):
+        self.tiers = tiers
+        self.token_budgets = token_budgets
+        self.log_file = log_file
+        self.short_query_tokens = short_query_tokens
+        self.confident_score = confident_score
+        self.shallow_history = shallow_history
+        self.long_context_tokens = long_context_tokens
+        self._lock = threading.Lock()
+
+    def route(
+        self,
+        query: str,
+        query_tokens: int,
+        estimated_tokens: int,
+        scores: list = None,
+        history_messages: int = 0
+    ) -> dict:
+
+        scores = [score for score in (scores or []) if score is not None]
+        features = {
+            "query_tokens": query_tokens,
+            "estimated_tokens": estimated_tokens,
+            "top_score": round(max(scores), 4) if scores else None,
+            "history_messages": history_messages,
+            "synthesis": any(hint in query.lower() for hint in SYNTHESIS_HINTS),
+        }
+
+        if estimated_tokens > self.long_context_tokens:
+            tier, reason = "long_context", "prompt exceeds long-context threshold"
+        elif (
+            query_tokens <= self.short_query_tokens
+            and history_messages <= self.shallow_history
+            and not features["synthesis"]
+            and (features["top_score"] is None or features["top_score"] >= self.confident_score)
+        ):
+            tier, reason = "fast", "short lookup with confident retrieval"
+        else:
+            tier, reason = "standard", "synthesis, deep conversation or weak retrieval"
+
+        # never pick a model whose per-minute token budget cannot hold the request
+        if self.token_budgets.get(self.tiers[tier], float("inf")) < estimated_tokens:
+            tier, reason = "long_context", f"{reason}; escalated for token budget"
+
+        return {"model": self.tiers[tier], "tier": tier, "reason": reason, "features": features}
+
+    def record(self, decision: dict, model: str, time_to_first_token: float, total_time: float, output_chars: int):
+
+        """Append a routing decision and its observed latency to the decision log"""
+
+        if not self.log_file:
+            return
+
+        entry = {
+            "timestamp": time.time(),
+            **decision,
+            "served_by": model,
+            "ttft_ms": round(time_to_first_token * 1000, 1),
+            "total_ms": round(total_time * 1000, 1),
+            "output_chars": output_chars,
+        }
+        with self._lock:
+            Path(self.log_file).parent.mkdir(parents=True, exist_ok=True)
+            with open(self.log_file, "a") as file:
+                file.write(json.dumps(entry) + "\n")
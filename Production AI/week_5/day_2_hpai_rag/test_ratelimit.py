@@ -0,0 +1,28 @@
+# test_ratelimit.py
+"""
+Tests for the Groq rate-limit scheduler. Run with: pytest test_ratelimit.py
+"""
+
+import asyncio
+
+from src import ratelimit
+from src.ratelimit import RateLimitScheduler, TokenBucket
+
+
+def test_oversized_background_request_is_admitted(monkeypatch):
+    monkeypatch.setitem(ratelimit.PRIORITY_CLASSES, "background", {"max_wait": 3.0, "reserve": 0.25})
+    scheduler = RateLimitScheduler({"model": (30, 6000)}, {})
+    budget = scheduler.budget("model")
+    budget.tokens = TokenBucket(6000, period=1.0)  # refill the whole bucket every second
+    budget.tokens.consume(6000)
+
+    # 90% of the bucket: more than is ever left over after the 25% background reserve
+    assert asyncio.run(scheduler.acquire("model", 5400, priority="background")) == "model"
+
+
+def test_background_reserve_still_holds_back_small_requests():
+    bucket = TokenBucket(6000)
+    bucket.consume(5000)
+
+    assert bucket.wait_time(500) == 0.0
+    assert bucket.wait_time(500, reserve=0.25) > 0.0
@@ -36,10 +36,18 @@ async def process(
         )
         
     try:
-        data_path = f"{env_config.data_dir}/projects/{project_id}"
-        documents = SimpleDirectoryReader(data_path).load_data()
-        await EmbeddingHandler().generate_and_store_embeddings(project_id, tenant_id, documents)
-        message = "Embeddings generated and stored successfully."
+        # only parse and embed files that are new or changed since the last index run
+        data_handler = DataHandler()
+        changed_files, manifest_entries = data_handler.get_changed_files(project_id)
+
+        if changed_files:
+            documents = SimpleDirectoryReader(input_files=changed_files).load_data()
+            await EmbeddingHandler().generate_and_store_embeddings(project_id, tenant_id, documents)
+            message = f"Embeddings generated and stored successfully for {len(changed_files)} file(s)."
+        else:
+            message = "No new or changed files to index."
+
+        data_handler.update_manifest(project_id, manifest_entries)
     
         return JSONResponse(
             content={"status": message},
@@ -1,9 +1,16 @@
 from src.config.appconfig import env_config
 from google.oauth2 import service_account
-import json
+import json, datetime, threading
+
+# refresh tokens this long before they expire, so no request goes out with a token about to lapse
+TOKEN_REFRESH_MARGIN = datetime.timedelta(minutes=5)
 
 class GCPAuth:
 
+    # process-wide: the service-account file is read once per path, not once per client
+    _credentials = {}
+    _lock = threading.Lock()
+
     def __init__(self):
         self.project_id: str = env_config.gcp_project_id
         self.region: str = env_config.gcp_region
@@ -14,22 +21,39 @@ class GCPAuth:
         if env_config.env.lower() in ["dev", "staging", "prod"]:
             return None
 
-        with open(self.secrets_path, "r") as file:
-            secrets = json.load(file)
-        
-        credentials = service_account.Credentials.from_service_account_info(
-            secrets,
-            scopes=['https://www.googleapis.com/auth/cloud-platform']
-        )
+        with GCPAuth._lock:
+            credentials = GCPAuth._credentials.get(self.secrets_path)
+            if credentials is None:
+                with open(self.secrets_path, "r") as file:
+                    secrets = json.load(file)
+
+                credentials = service_account.Credentials.from_service_account_info(
+                    secrets,
+                    scopes=['https://www.googleapis.com/auth/cloud-platform']
+                )
+                GCPAuth._credentials[self.secrets_path] = credentials
 
         return credentials
 
+    @staticmethod
+    def token_expiring(credentials) -> bool:
+        if not credentials.token or credentials.expiry is None:
+            return True
+        # google-auth keeps expiry as naive UTC
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+        return credentials.expiry - now <= TOKEN_REFRESH_MARGIN
+
     def refresh_auth(self, credentials):
 
-        "Additional layer for AnthropicVertex"
+        "Additional layer for AnthropicVertex; only hits the token endpoint when the cached token is near expiry"
         
+        if not self.token_expiring(credentials):
+            return credentials
+
         from google.auth.transport.requests import Request  # type: ignore[import-untyped]
-        credentials.refresh(Request())
+        with GCPAuth._lock:
+            if self.token_expiring(credentials):
+                credentials.refresh(Request())
 
         return credentials
 
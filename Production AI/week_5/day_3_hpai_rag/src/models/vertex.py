@@ -1,4 +1,4 @@
-import vertexai, json
+import vertexai, json, threading
 from vertexai.generative_models import GenerativeModel
 from llama_index.llms.vertex import Vertex
 from src.infra.auth import GCPAuth
@@ -6,22 +6,54 @@ from src.infra.auth import GCPAuth
 
 class VertexClient(GCPAuth):
 
+    """
+    Vertex AI init and model objects are cached per process: the first call pays the setup,
+    later calls (and later VertexClient instances) reuse it.
+    """
+
+    _initialized = set()
+    _models = {}
+    _init_lock = threading.Lock()
+
+    def _init_vertex(self):
+        key = (self.project_id, self.region)
+        if key in VertexClient._initialized:
+            return
+        with VertexClient._init_lock:
+            if key not in VertexClient._initialized:
+                vertexai.init(
+                    project=self.project_id, 
+                    location=self.region,
+                    credentials=self.load_credentials()
+                )
+                VertexClient._initialized.add(key)
+
+    def _cached(self, key, factory):
+        model = VertexClient._models.get(key)
+        if model is None:
+            with VertexClient._init_lock:
+                model = VertexClient._models.get(key)
+                if model is None:
+                    model = VertexClient._models[key] = factory()
+        return model
+
     def base_model(self, model: str):
-        vertexai.init(
-            project=self.project_id, 
-            location=self.region
-        )
-        return GenerativeModel(model)
+        self._init_vertex()
+        return self._cached(("base", self.project_id, self.region, model), lambda: GenerativeModel(model))
 
     def rag_model(self, model: str, temperature=0.1, max_tokens=1024, context_window=128000):
-        credentials = self.load_credentials()
-        model = Vertex(
-            model=model,
-            project=self.project_id,
-            location=self.region,
-            credentials=credentials,
-            temperature=temperature,
-            context_window=context_window,
-            max_tokens=max_tokens
+        def build():
+            return Vertex(
+                model=model,
+                project=self.project_id,
+                location=self.region,
+                credentials=self.load_credentials(),
+                temperature=temperature,
+                context_window=context_window,
+                max_tokens=max_tokens
+            )
+
+        return self._cached(
+            ("rag", self.project_id, self.region, model, temperature, max_tokens, context_window), build
         )
-        
+
@@ -1,4 +1,4 @@
-import tempfile, groq, time, traceback
+import tempfile, groq, time, traceback, hashlib
 from src.models import *
 # from src.prompts import *
 from src.config.appconfig import *
@@ -1,9 +1,10 @@
-import os
+import os, json, hashlib
 from src.utils.constants import *
 
 class DataHandler:
 
     data_dir = env_config.data_dir + "/projects"
+    manifest_dir = env_config.data_dir + "/manifests"
 
     ALLOWED_FILES: List = [
         "txt", "csv", "htm", "html", "pdf", "json", "doc", "docx", "pptx"
@@ -84,3 +85,88 @@ class DataHandler:
                 raise UploadError(message)
             
         raise FileCheckError(file_checks["status"])
+
+    def manifest_path(self, project_id: str) -> str:
+        return os.path.join(self.manifest_dir, f"{project_id}.json")
+
+    def load_manifest(self, project_id: str) -> dict:
+
+        """Return the `{file_path: {"sha256", "mtime", "size"}}` record of files already indexed for a project"""
+
+        path = self.manifest_path(project_id)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, "r") as file:
+                return json.load(file)
+        except (OSError, json.JSONDecodeError):
+            logger.warning(f"Could not read manifest for project {project_id}. Re-indexing all files...")
+            return {}
+
+    def save_manifest(self, project_id: str, manifest: dict):
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        path = self.manifest_path(project_id)
+
+        # write to a temp file first so a crash mid-write never leaves a corrupt manifest
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(manifest, file, indent=2)
+        os.replace(tmp_path, path)
+
+    def file_hash(self, filepath: str, chunk_size: int = 1024*1024) -> str:
+        sha256 = hashlib.sha256()
+        with open(filepath, "rb") as file:
+            for block in iter(lambda: file.read(chunk_size), b""):
+                sha256.update(block)
+        return sha256.hexdigest()
+
+    def get_changed_files(self, project_id: str) -> tuple[List[str], dict]:
+
+        """
+        Compare the project directory against its manifest and return the files that are new or changed,
+        together with their fresh manifest entries. The mtime/size pair is checked first, so unchanged
+        files are skipped without being hashed; a re-upload of identical content is caught by the hash.
+        """
+
+        project_dir = os.path.join(self.data_dir, project_id)
+        if not os.path.isdir(project_dir):
+            return [], {}
+
+        manifest = self.load_manifest(project_id)
+        changed_files, entries = [], {}
+
+        for root, _, filenames in os.walk(project_dir):
+            for filename in sorted(filenames):
+                if filename.startswith(".") or not self.is_allowed_file(filename):
+                    continue
+
+                filepath = os.path.join(root, filename)
+                stat = os.stat(filepath)
+                previous = manifest.get(filepath)
+
+                if previous and previous["mtime"] == stat.st_mtime and previous["size"] == stat.st_size:
+                    continue
+
+                entry = {
+                    "sha256": self.file_hash(filepath),
+                    "mtime": stat.st_mtime,
+                    "size": stat.st_size
+                }
+                entries[filepath] = entry
+
+                if previous and previous["sha256"] == entry["sha256"]:
+                    continue # same content re-uploaded; only the mtime moved
+                changed_files.append(filepath)
+
+        logger.info(f"{len(changed_files)} new or changed file(s) to index for project {project_id}")
+        return changed_files, entries
+
+    def update_manifest(self, project_id: str, entries: dict):
+
+        """Record files as indexed. Call only after their embeddings have been stored."""
+
+        if not entries:
+            return
+        manifest = self.load_manifest(project_id)
+        manifest.update(entries)
+        self.save_manifest(project_id, manifest)
@@ -43,7 +43,14 @@ class EmbeddingHandler:
             content_list = [doc["content"] for doc in doc_chunks]
             metadata_list = [doc["metadata"] for doc in doc_chunks]
 
-            id_list = [f"embedding-{i+1}" for i in range(len(content_list))]
+            # ids are scoped to the source file so incremental indexing never overwrites another file's chunks
+            chunk_counts = {}
+            id_list = []
+            for metadata in metadata_list:
+                source = metadata.get("file_path", "")
+                chunk_counts[source] = chunk_counts.get(source, 0) + 1
+                source_key = hashlib.sha1(source.encode()).hexdigest()[:12]
+                id_list.append(f"embedding-{source_key}-{chunk_counts[source]}")
 
             embeddings = [self.embed_func.get_text_embedding(item) for item in content_list]
             # logger.info(f"Document token sizes: {[len(self.tokenizer(item)) for item in content_list]}")
@@ -54,6 +61,11 @@ class EmbeddingHandler:
             logger.error(message)
             raise EmbeddingError(message)
 
+        # drop chunks left over from earlier versions of the re-indexed files
+        source_files = sorted({metadata.get("file_path") for metadata in metadata_list if metadata.get("file_path")})
+        if source_files:
+            chroma_collection.delete(where={"file_path": {"$in": source_files}})
+
         # populate chroma collection with embeddings
         logger.info(f"Populating collection {collection_name} with computed embeddings...")
         chroma_collection.upsert(
@@ -3,16 +3,24 @@ Multi-Platform Post Rewriter using Google Cloud Functions + Vertex AI
 ====================================================================
 
 This Cloud Function:
-1. Accepts CSV uploads with 'source' and 'post' columns
+1. Accepts CSV uploads with 'source' and 'post' columns, read in chunks of CSV_CHUNK_ROWS rows
 2. Uses Vertex AI Gemini to rewrite each post in a professional brand tone
-3. Returns an Excel file (.xlsx) with the rewritten posts
+   (rows run concurrently on a bounded thread pool, with per-row retries and shared 429 back-off)
+3. Returns an Excel file (.xlsx) with the rewritten posts, in input order
+   (?format=csv or ?format=jsonl streams rows back as each chunk completes)
+4. Rewrites each distinct (source, post) once and caches results across uploads;
+   on xlsx responses, X-Cache-Hits / X-Duplicate-Rows / X-Generated-Rows headers report
+   the savings. Streamed csv/jsonl responses send their headers before any row is
+   rewritten, so they log the same counts once the stream ends instead
+5. Packs several short posts for the same platform into one JSON-mode Gemini call
+   (falls back to one call per post when a packed reply doesn't validate)
 
 Input CSV format:
 - id (optional): unique identifier
 - source: platform name (linkedin, twitter, instagram, slack, email, etc.)
 - post: original text content to rewrite
 
-Output Excel format:
+Output format (xlsx, csv or jsonl):
 - id: preserved from input or auto-generated
 - source: platform name
 - rewritten_post: AI-generated branded version
@@ -22,10 +30,396 @@ Date: 2025-09-27
 """
 
 import io
+import os
+import csv
+import json
+import logging
+import shutil
+import itertools
+import tempfile
+import time
+import random
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import vertexai
-from vertexai.generative_models import GenerativeModel
-from flask import Request
+from vertexai.generative_models import GenerativeModel, GenerationConfig
+from google.api_core import exceptions as google_exceptions
+from flask import Request, stream_with_context
+from openpyxl import Workbook
+
+logger = logging.getLogger(__name__)
+
+# Concurrency and retry settings (override with environment variables on deploy)
+MAX_CONCURRENCY = int(os.getenv("MAX_CONCURRENCY", "8"))          # Gemini calls in flight at once
+MAX_RETRIES = int(os.getenv("MAX_RETRIES", "4"))                  # retries per row on transient errors
+REQUESTS_PER_MINUTE = int(os.getenv("REQUESTS_PER_MINUTE", "0"))  # client-side cap; 0 = no cap
+CSV_CHUNK_ROWS = int(os.getenv("CSV_CHUNK_ROWS", "500"))       # rows read, rewritten and written per step;
+                                                                # keep it well above MAX_CONCURRENCY * PACK_SIZE
+PACK_SIZE = int(os.getenv("PACK_SIZE", "10"))                  # posts per packed call; 1 = packing off
+PACK_MAX_CHARS = int(os.getenv("PACK_MAX_CHARS", "500"))        # longer posts always get their own call
+REWRITE_CACHE_SIZE = int(os.getenv("REWRITE_CACHE_SIZE", "50000"))  # in-memory entries per instance
+REWRITE_CACHE_PATH = os.getenv("REWRITE_CACHE_PATH", "")               # optional SQLite file; "" = memory only
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+
+# Errors worth retrying: quota/rate limits (429) and transient server-side failures
+RATE_LIMIT_ERRORS = (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests)
+RETRYABLE_ERRORS = RATE_LIMIT_ERRORS + (
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+)
+
+
+class RateLimiter:
+    """
+    Shared by all worker threads in the instance.
+    - Spaces calls to stay under REQUESTS_PER_MINUTE (if set)
+    - When any call is rate limited, pauses every thread for the back-off, so the pool
+      doesn't keep hitting the quota with the other requests it has in flight
+    """
+
+    def __init__(self, requests_per_minute: int = 0):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+        self.paused_until = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot, self.paused_until)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def pause(self, seconds: float):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+rate_limiter = RateLimiter(REQUESTS_PER_MINUTE)
+
+MODEL_NAME = "gemini-2.5-flash"  # Current stable Gemini model
+# Replace 'doc-rewriter-project' with your actual project ID (or set GCP_PROJECT on deploy)
+GCP_PROJECT = os.getenv("GCP_PROJECT", "doc-rewriter-project")
+GCP_LOCATION = os.getenv("GCP_LOCATION", "us-central1")
+PROMPT_VERSION = "v1"            # bump whenever build_prompt changes, so cached rewrites are not reused
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model() -> GenerativeModel:
+    """
+    Initialize Vertex AI and the Gemini model once per instance, on first use.
+    Warm instances reuse them across requests; access tokens are refreshed
+    by google-auth ahead of expiry, so nothing needs re-initializing.
+    """
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                vertexai.init(project=GCP_PROJECT, location=GCP_LOCATION)
+                _model = GenerativeModel(MODEL_NAME)
+    return _model
+
+
+class RewriteCache:
+    """
+    Finished rewrites keyed by (source, normalized post, prompt version, model).
+    - In memory: bounded LRU that lives as long as the warm instance
+    - On disk (optional): SQLite file at REWRITE_CACHE_PATH, e.g. on a mounted bucket,
+      so results survive cold starts and are shared with later uploads
+    Only successful rewrites are stored; failed rows are retried on the next upload.
+    """
+
+    def __init__(self, max_entries: int, path: str = ""):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS rewrites (key TEXT PRIMARY KEY, rewrite TEXT)")
+            self.db.commit()
+
+    @staticmethod
+    def key(source: str, text: str) -> str:
+        # same post with different spacing/line breaks or platform casing -> same key
+        normalized_post = " ".join(unicodedata.normalize("NFC", text).split())
+        normalized_source = source.strip().lower()
+        raw = "\x1f".join((normalized_source, normalized_post, PROMPT_VERSION, MODEL_NAME))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, rewrite: str):
+        self.entries[key] = rewrite
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get(self, key: str):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            if self.db is None:
+                return None
+            row = self.db.execute("SELECT rewrite FROM rewrites WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._remember(key, row[0])
+            return row[0]
+
+    def set(self, key: str, rewrite: str):
+        with self.lock:
+            self._remember(key, rewrite)
+            if self.db is not None:
+                self.db.execute("INSERT OR REPLACE INTO rewrites (key, rewrite) VALUES (?, ?)", (key, rewrite))
+                self.db.commit()
+
+
+rewrite_cache = RewriteCache(REWRITE_CACHE_SIZE, REWRITE_CACHE_PATH)
+
+
+def build_prompt(source: str, text: str) -> str:
+    """Create prompt for brand-consistent rewriting."""
+    return (
+        f"Rewrite this {source} post in a professional, engaging, and "
+        f"brand-consistent tone. Keep it concise, impactful, and appropriate "
+        f"for the platform. Maintain any emojis if they fit the brand voice:\n\n{text}"
+    )
+
+
+# Packed calls answer in JSON mode: one {"id", "rewrite"} object per input post
+PACK_GENERATION_CONFIG = GenerationConfig(
+    response_mime_type="application/json",
+    response_schema={
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {"id": {"type": "integer"}, "rewrite": {"type": "string"}},
+            "required": ["id", "rewrite"],
+        },
+    },
+)
+
+
+def build_pack_prompt(source: str, texts: list) -> str:
+    """One prompt for several posts of the same platform; the instructions are paid for once."""
+    posts = json.dumps([{"id": i, "post": text} for i, text in enumerate(texts, 1)], ensure_ascii=False)
+    return (
+        f"Rewrite each of these {source} posts in a professional, engaging, and "
+        f"brand-consistent tone. Keep each one concise, impactful, and appropriate "
+        f"for the platform. Maintain any emojis if they fit the brand voice. "
+        f"Rewrite every post independently and return one object per post, "
+        f"with the same id:\n\n{posts}"
+    )
+
+
+def parse_pack_response(text: str, count: int) -> list:
+    """
+    Validate a packed reply: a JSON array with exactly ids 1..count, each with a non-empty rewrite.
+    Returns rewrites in id order; raises ValueError otherwise.
+    """
+    items = json.loads(text)
+    if not isinstance(items, list) or len(items) != count:
+        raise ValueError(f"expected {count} rewrites, got {len(items) if isinstance(items, list) else type(items).__name__}")
+    rewrites = {}
+    for item in items:
+        rewrite = item.get("rewrite") if isinstance(item, dict) else None
+        if not isinstance(rewrite, str) or not rewrite.strip():
+            raise ValueError(f"invalid item {item!r}")
+        rewrites[item.get("id")] = rewrite.strip()
+    if set(rewrites) != set(range(1, count + 1)):
+        raise ValueError(f"ids {sorted(rewrites, key=str)} do not match 1..{count}")
+    return [rewrites[i] for i in range(1, count + 1)]
+
+
+def generate_with_retry(model: GenerativeModel, prompt: str, generation_config=None) -> str:
+    """
+    Call Gemini, retrying transient errors with exponential back-off and jitter.
+    Raises the last error once MAX_RETRIES is exhausted.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        rate_limiter.wait()
+        try:
+            response = model.generate_content(prompt, generation_config=generation_config)
+            return response.text.strip()
+        except RETRYABLE_ERRORS as e:
+            if attempt == MAX_RETRIES:
+                raise
+            delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)
+            delay *= 0.5 + random.random() / 2  # jitter: retries from many threads don't line up
+            if isinstance(e, RATE_LIMIT_ERRORS):
+                rate_limiter.pause(delay)
+            time.sleep(delay)
+
+
+def plan_jobs(pending: dict, sources: list, texts: list) -> list:
+    """
+    Split the rows that need Gemini into jobs of (key, row index) pairs:
+    short posts are grouped by platform into packs of up to PACK_SIZE, the rest run alone.
+    """
+    jobs, packs = [], {}
+    for key, index in pending.items():
+        if PACK_SIZE > 1 and len(texts[index]) <= PACK_MAX_CHARS:
+            packs.setdefault(sources[index].strip().lower(), []).append((key, index))
+        else:
+            jobs.append([(key, index)])
+    for rows in packs.values():
+        jobs.extend(rows[i:i + PACK_SIZE] for i in range(0, len(rows), PACK_SIZE))
+    return jobs
+
+
+def rewrite_posts(model: GenerativeModel, sources: list, texts: list) -> tuple:
+    """
+    Rewrite all posts with at most MAX_CONCURRENCY calls in flight.
+    Each distinct (source, post) is generated once: duplicates in the file reuse the first
+    row's rewrite, and rows seen in earlier uploads come from rewrite_cache. Short posts
+    are packed several to a call (see plan_jobs).
+    Results come back in input order; a row that still fails after its retries
+    gets an error message instead of failing the whole file.
+
+    Returns:
+        tuple: (rewrites, stats) where stats counts cache_hits, duplicates, generated rows and calls
+    """
+    keys = [rewrite_cache.key(source, text) for source, text in zip(sources, texts)]
+    results = {}   # key -> rewrite, for keys already known
+    pending = {}   # key -> first row index, for keys that need a Gemini call
+    for index, key in enumerate(keys):
+        if key in results or key in pending:
+            continue
+        cached = rewrite_cache.get(key)
+        if cached is not None:
+            results[key] = cached
+        else:
+            pending[key] = index
+    cache_hits = sum(1 for key in keys if key in results)
+
+    def rewrite(key, index):
+        try:
+            rewritten = generate_with_retry(model, build_prompt(sources[index], texts[index]))
+            rewrite_cache.set(key, rewritten)
+            return rewritten
+        except Exception as e:
+            # Handle individual row errors gracefully
+            return f"Error processing row {index + 1}: {str(e)}"
+
+    def run_job(rows):
+        """Returns ({key: rewrite}, number of Gemini calls made)."""
+        if len(rows) > 1:
+            try:
+                reply = generate_with_retry(
+                    model,
+                    build_pack_prompt(sources[rows[0][1]], [texts[index] for _, index in rows]),
+                    generation_config=PACK_GENERATION_CONFIG
+                )
+                rewrites = parse_pack_response(reply, len(rows))
+                for (key, _), rewritten in zip(rows, rewrites):
+                    rewrite_cache.set(key, rewritten)
+                return dict(zip((key for key, _ in rows), rewrites)), 1
+            except Exception:
+                # malformed or incomplete packed reply: fall back to one call per post
+                return {key: rewrite(key, index) for key, index in rows}, 1 + len(rows)
+        key, index = rows[0]
+        return {key: rewrite(key, index)}, 1
+
+    calls = 0
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENCY) as executor:
+        for job_results, job_calls in executor.map(run_job, plan_jobs(pending, sources, texts)):
+            results.update(job_results)
+            calls += job_calls
+
+    stats = {
+        "cache_hits": cache_hits,
+        "duplicates": len(keys) - cache_hits - len(pending),
+        "generated": len(pending),
+        "calls": calls,
+    }
+    return [results[key] for key in keys], stats
+
+
+OUTPUT_COLUMNS = ["id", "source", "rewritten_post"]
+OUTPUT_FORMATS = {
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "rewritten_posts.xlsx"),
+    "csv": ("text/csv; charset=utf-8", "rewritten_posts.csv"),
+    "jsonl": ("application/x-ndjson", "rewritten_posts.jsonl"),
+}
+
+
+def rewrite_chunks(model: GenerativeModel, chunks, stats: dict):
+    """
+    Rewrite the CSV one chunk at a time, yielding each chunk's output rows as
+    [id, source, rewritten_post] lists. Only one chunk is held in memory at a time;
+    duplicates in later chunks are served by rewrite_cache.
+    """
+    next_id = 1
+    for chunk in chunks:
+        rewrites, chunk_stats = rewrite_posts(
+            model,
+            chunk["source"].astype(str).tolist(),
+            chunk["post"].astype(str).tolist()
+        )
+        for name, count in chunk_stats.items():
+            stats[name] = stats.get(name, 0) + count
+        # Use existing ID or auto-generate
+        ids = chunk["id"].tolist() if "id" in chunk.columns else range(next_id, next_id + len(chunk))
+        next_id += len(chunk)
+        yield [list(row) for row in zip(ids, chunk["source"].tolist(), rewrites)]
+
+
+def stream_csv(row_chunks):
+    """Yield CSV text: the header, then one piece per rewritten chunk."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(OUTPUT_COLUMNS)
+    yield buffer.getvalue()
+    for rows in row_chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+
+def stream_jsonl(row_chunks):
+    """Yield one JSON object per line, one piece per rewritten chunk."""
+    for rows in row_chunks:
+        yield "".join(
+            json.dumps(dict(zip(OUTPUT_COLUMNS, row)), ensure_ascii=False, default=str) + "\n"
+            for row in rows
+        )
+
+
+def write_xlsx(row_chunks):
+    """
+    Write rows into a write-only openpyxl workbook, which flushes rows to a temp file
+    instead of keeping every cell in memory. Returns the saved workbook as an open temp file.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("RewrittenPosts")
+    sheet.append(OUTPUT_COLUMNS)
+    for rows in row_chunks:
+        for row in rows:
+            sheet.append(row)
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+
+def stream_file(file, block_size: int = 64 * 1024):
+    """Yield a file in blocks, then close it."""
+    with file:
+        while block := file.read(block_size):
+            yield block
+
 
 def process_csv(request: Request):
     """
@@ -33,78 +427,72 @@ def process_csv(request: Request):
     
     Args:
         request (flask.Request): HTTP request object containing uploaded CSV file
+            and an optional 'format' (xlsx, csv, jsonl) query parameter or form field
         
     Returns:
-        tuple: (Excel file bytes, HTTP status code, headers)
+        tuple: (output file body, HTTP status code, headers)
     """
     
-    # Initialize Vertex AI client
-    # Replace 'doc-rewriter-project' with your actual project ID
-    vertexai.init(project="doc-rewriter-project", location="us-central1")
-    model = GenerativeModel("gemini-2.5-flash")  # Current stable Gemini model
+    # Vertex AI client (initialized once per instance)
+    model = get_model()
     
     # Validate file upload
     if "file" not in request.files:
         return {"error": "Upload a CSV file with field name 'file'."}, 400
+
+    output_format = (request.args.get("format") or request.form.get("format") or "xlsx").lower()
+    if output_format not in OUTPUT_FORMATS:
+        return {"error": f"format must be one of {', '.join(OUTPUT_FORMATS)}"}, 400
+    content_type, filename = OUTPUT_FORMATS[output_format]
     
-    # Read uploaded CSV into pandas DataFrame
+    upload = request.files["file"]
+    if output_format != "xlsx":
+        # Flask closes uploaded files when the view returns, but a streamed response keeps
+        # reading afterwards, so stream from a private copy (kept in memory up to 8 MB, then on disk)
+        copy = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+        shutil.copyfileobj(upload.stream, copy)
+        copy.seek(0)
+        upload = copy
+
+    # Read uploaded CSV in chunks; the first chunk is read now to validate the file
     try:
-        df = pd.read_csv(request.files["file"])
+        chunks = pd.read_csv(upload, chunksize=CSV_CHUNK_ROWS)
+        first_chunk = next(chunks)
     except Exception as e:
         return {"error": f"Failed to read CSV: {str(e)}"}, 400
     
     # Validate required columns exist
-    if not {"source", "post"}.issubset(df.columns):
+    if not {"source", "post"}.issubset(first_chunk.columns):
         return {"error": "CSV must contain 'source' and 'post' columns"}, 400
     
-    # Process each row and generate rewrites
-    rewrites = []
-    for index, row in df.iterrows():
-        text = str(row["post"])
-        source = str(row["source"])
-        
-        try:
-            # Create prompt for brand-consistent rewriting
-            prompt = (
-                f"Rewrite this {source} post in a professional, engaging, and "
-                f"brand-consistent tone. Keep it concise, impactful, and appropriate "
-                f"for the platform. Maintain any emojis if they fit the brand voice:\n\n{text}"
-            )
-            
-            # Call Vertex AI Gemini model
-            response = model.generate_content(prompt)
-            rewrites.append(response.text.strip())
-            
-        except Exception as e:
-            # Handle individual row errors gracefully
-            rewrites.append(f"Error processing row {index + 1}: {str(e)}")
-    
-    # Build output DataFrame
-    output_df = pd.DataFrame({
-        "id": df.get("id", range(1, len(df) + 1)),  # Use existing ID or auto-generate
-        "source": df["source"],
-        "rewritten_post": rewrites
-    })
+    # Generate rewrites chunk by chunk: concurrently, order preserved, skipping duplicates and cached rows
+    stats = {}
+    row_chunks = rewrite_chunks(model, itertools.chain([first_chunk], chunks), stats)
+    headers = {
+        "Content-Type": content_type,
+        "Content-Disposition": f"attachment; filename={filename}"
+    }
+
+    if output_format != "xlsx":
+        # Stream rows out as each chunk completes; the response starts before the file is done,
+        # so per-file counts can't go in headers and are logged instead
+        def stream():
+            body = stream_csv(row_chunks) if output_format == "csv" else stream_jsonl(row_chunks)
+            yield from body
+            logger.info("rewrite stats for %s upload: %s", output_format, stats)
+        return stream_with_context(stream()), 200, headers
     
-    # Create Excel file in memory
-    output_buffer = io.BytesIO()
+    # Create Excel file; xlsx is a zip, so it can only be sent once complete
     try:
-        output_df.to_excel(
-            output_buffer, 
-            index=False, 
-            sheet_name="RewrittenPosts",
-            engine='openpyxl'
-        )
-        output_buffer.seek(0)
+        output_file = write_xlsx(row_chunks)
     except Exception as e:
         return {"error": f"Failed to create Excel file: {str(e)}"}, 500
     
     # Return Excel file with proper headers
-    return (
-        output_buffer.getvalue(),
-        200,
-        {
-            "Content-Type": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            "Content-Disposition": "attachment; filename=rewritten_posts.xlsx"
-        },
-    )
+    headers.update({
+        "X-Cache-Hits": str(stats.get("cache_hits", 0)),
+        "X-Duplicate-Rows": str(stats.get("duplicates", 0)),
+        "X-Generated-Rows": str(stats.get("generated", 0)),
+        "X-Gemini-Calls": str(stats.get("calls", 0))
+    })
+    return stream_file(output_file), 200, headers